@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib import admin
+
+from .paginator import CachedCountPaginator
+
+
+class CachedCountAdmin(admin.ModelAdmin):
+    """
+    Список объектов без COUNT(*) на каждую страницу.
+
+    Общее количество не считается вовсе, а количество отфильтрованных строк
+    берется из кэша или оценивается по статистике БД.
+    """
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+
+class SoftDeleteAdmin(admin.ModelAdmin):
+    """
+    Удаление через админку, при SOFT_DELETE только скрывающее объекты.
+
+    Подклассы переопределяют soft_delete(obj); связанные строки удаляет
+    фоновая задача, поэтому страница подтверждения их не собирает.
+    """
+    def soft_delete(self, obj):
+        # модель без скрытия удаляется сразу
+        obj.delete()
+
+    def delete_model(self, request, obj):
+        if not settings.SOFT_DELETE:
+            return super().delete_model(request, obj)
+        self.soft_delete(obj)
+
+    def delete_queryset(self, request, queryset):
+        if not settings.SOFT_DELETE:
+            return super().delete_queryset(request, queryset)
+        for obj in queryset:
+            self.soft_delete(obj)
+
+    def get_deleted_objects(self, objs, request):
+        if not settings.SOFT_DELETE:
+            return super().get_deleted_objects(objs, request)
+        return (
+            [str(obj) for obj in objs],
+            {self.opts.verbose_name_plural: len(objs)},
+            set(),
+            [],
+        )
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import holes, taskqueue
+        holes.autodiscover()
+        taskqueue.autodiscover()
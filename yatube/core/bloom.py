@@ -0,0 +1,60 @@
+"""
+Фильтр Блума: компактное множество с ложноположительными ответами.
+
+«Нет» фильтра точное, «возможно» нужно проверить по базе. Фильтр
+сериализуется в байты, чтобы храниться в общем кэше.
+"""
+import hashlib
+import math
+import struct
+
+HEADER = struct.Struct('>III')
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01, bits=None, hashes=None,
+                 data=None, count=0):
+        self.capacity = max(int(capacity), 1)
+        if bits is None:
+            bits = math.ceil(-self.capacity * math.log(error_rate)
+                             / math.log(2) ** 2)
+            hashes = max(1, round(bits / self.capacity * math.log(2)))
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray(data or math.ceil(bits / 8))
+        self.count = count
+
+    def positions(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        first, second = struct.unpack('>QQ', digest)
+        # двойное хэширование вместо k независимых функций
+        return ((first + i * second) % self.bits for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.data[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.data[position >> 3] & (1 << (position & 7))
+                   for position in self.positions(item))
+
+    def to_bytes(self):
+        return (HEADER.pack(self.bits, self.hashes, self.capacity)
+                + struct.pack('>I', self.count) + bytes(self.data))
+
+    @classmethod
+    def from_bytes(cls, raw):
+        bits, hashes, capacity = HEADER.unpack_from(raw)
+        (count,) = struct.unpack_from('>I', raw, HEADER.size)
+        return cls(capacity, bits=bits, hashes=hashes,
+                   data=raw[HEADER.size + 4:], count=count)
+
+    @classmethod
+    def build(cls, items, error_rate=0.01, min_capacity=64):
+        items = list(items)
+        # запас, чтобы новые элементы не заставляли сразу перестраивать
+        bloom = cls(max(len(items) * 2, min_capacity), error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
@@ -0,0 +1,58 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+
+def lock_key(key):
+    return f'{key}:lock'
+
+
+def _compute_and_store(cache, key, compute, timeout, stale):
+    started = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - started
+    # храним дольше timeout, чтобы было что отдать, пока идет пересчет
+    cache.set(key, (value, time.time() + timeout, delta), timeout + stale)
+    return value
+
+
+def get_or_refresh(key, compute, timeout, cache=default_cache, stale=None,
+                   lock_timeout=None, beta=None):
+    """
+    Достает значение из кэша, пересчитывая его не более чем одним воркером.
+
+    Пока один воркер держит блокировку и пересчитывает значение, остальные
+    получают прежнее значение (в пределах окна stale) или ждут результата,
+    если отдавать нечего. Незадолго до истечения значение может быть
+    пересчитано заранее с вероятностью, растущей к концу срока (XFetch).
+    """
+    if stale is None:
+        stale = settings.CACHE_STALE_SECONDS
+    if lock_timeout is None:
+        lock_timeout = settings.CACHE_LOCK_SECONDS
+    if beta is None:
+        beta = settings.CACHE_EARLY_REFRESH_BETA
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        early = delta * beta * math.log(1 - random.random())
+        if time.time() - early < expires_at:
+            return value
+        if not cache.add(lock_key(key), True, lock_timeout):
+            return value
+    elif not cache.add(lock_key(key), True, lock_timeout):
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_SECONDS)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return _compute_and_store(cache, key, compute, timeout, stale)
+    try:
+        return _compute_and_store(cache, key, compute, timeout, stale)
+    finally:
+        cache.delete(lock_key(key))
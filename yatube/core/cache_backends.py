@@ -0,0 +1,104 @@
+"""
+Кэш в памяти процесса, сжимающий крупные значения.
+
+Значение хранится как байты с маркером в первом байте: маленькие - просто
+pickle (быстрый путь без сжатия), крупные - zlib поверх pickle, а готовые
+gzip-тела ответов - как есть, чтобы отдавать их клиенту без пересжатия.
+Целые числа лежат без обертки, чтобы incr/decr оставались атомарными.
+"""
+import gzip
+import pickle
+import struct
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+RAW = 0
+ZLIB = 1
+GZIP = 2
+HEADER = struct.Struct('>BI')
+MISSING = object()
+
+
+class CompressedLocMemCache(LocMemCache):
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        options = params.get('OPTIONS', {})
+        self.min_length = options.get('COMPRESS_MIN_LENGTH', 1024)
+        self.level = options.get('COMPRESS_LEVEL', 6)
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, value):
+        if type(value) is int:
+            return value
+        data = pickle.dumps(value, self.pickle_protocol)
+        if len(data) >= self.min_length:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return HEADER.pack(ZLIB, len(data)) + compressed
+        return bytes((RAW,)) + data
+
+    def decode(self, stored):
+        if not isinstance(stored, bytes):
+            return stored
+        marker = stored[0]
+        if marker == RAW:
+            return pickle.loads(stored[1:])
+        if marker == ZLIB:
+            return pickle.loads(zlib.decompress(stored[HEADER.size:]))
+        return gzip.decompress(stored[HEADER.size:])
+
+    def get(self, key, default=None, version=None):
+        stored = super().get(key, MISSING, version)
+        if stored is MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return self.decode(stored)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, self.encode(value), timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return super().add(key, self.encode(value), timeout, version)
+
+    def set_gzip(self, key, body, timeout=DEFAULT_TIMEOUT,
+                 version=None, raw_length=0):
+        """Сохраняет уже сжатое gzip-тело; get вернет распакованные байты."""
+        super().set(key, HEADER.pack(GZIP, raw_length) + body, timeout,
+                    version)
+
+    def get_gzip(self, key, version=None):
+        """gzip-тело, сохраненное set_gzip, без распаковки."""
+        stored = super().get(key, MISSING, version)
+        if not isinstance(stored, bytes) or stored[0] != GZIP:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return stored[HEADER.size:]
+
+    def stats(self):
+        """Занятая память и доля попаданий для отчета."""
+        with self._lock:
+            entries = list(self._cache.values())
+        stored_bytes = raw_bytes = 0
+        for pickled in entries:
+            stored_bytes += len(pickled)
+            value = pickle.loads(pickled)
+            if isinstance(value, bytes) and value[0] != RAW:
+                raw_bytes += HEADER.unpack_from(value)[1]
+            else:
+                raw_bytes += len(pickled)
+        requests = self.hits + self.misses
+        return {
+            'entries': len(entries),
+            'stored_bytes': stored_bytes,
+            'raw_bytes': raw_bytes,
+            'compression_ratio': (
+                round(raw_bytes / stored_bytes, 2) if stored_bytes else None),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / requests, 3) if requests else None,
+        }
@@ -0,0 +1,47 @@
+"""
+gzip-сжатие ответов: целиком и потоком со сбросом после каждого куска.
+
+Против BREACH в заголовок gzip можно добавить поле имени файла случайной
+длины: содержимое не меняется, а длина ответа перестает точно отражать
+степень сжатия секрета (прием Heal-the-BREACH).
+"""
+import secrets
+import struct
+import zlib
+
+FNAME = 0x08
+# буквы для имени файла: любые ненулевые байты подошли бы, но так нагляднее
+PADDING_ALPHABET = b'abcdefghijklmnopqrstuvwxyz0123456789'
+
+
+def gzip_header(padding=0):
+    flags = 0
+    name = b''
+    if padding:
+        length = 1 + secrets.randbelow(padding)
+        name = bytes(secrets.choice(PADDING_ALPHABET)
+                     for _ in range(length)) + b'\0'
+        flags = FNAME
+    # время модификации 0: одинаковое тело дает одинаковые байты
+    return struct.pack('<BBBBIBB', 0x1f, 0x8b, 8, flags, 0, 0, 255) + name
+
+
+def compress_chunks(chunks, level=6, padding=0):
+    """Сжимает последовательность байтов, отдавая данные после каждого куска."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = 0
+    size = 0
+    yield gzip_header(padding)
+    for chunk in chunks:
+        if not chunk:
+            continue
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush() + struct.pack('<II', crc, size & 0xffffffff)
+
+
+def compress_bytes(data, level=6, padding=0):
+    return b''.join(compress_chunks((data,), level, padding))
@@ -0,0 +1,54 @@
+"""
+Публикация событий для сервера SSE (manage.py runsse).
+
+Процессы сайта отправляют датаграммы в unix-сокет сервера событий. Если
+сервер не запущен, событие просто теряется: страницы от этого не ломаются.
+"""
+import json
+import logging
+import socket
+
+from django.conf import settings
+from django.core import signing
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'core.events.follow'
+
+_socket = None
+
+
+def publish(channels, **data):
+    global _socket
+    if not settings.SSE_SOCKET:
+        return
+    message = json.dumps({'channels': list(channels), **data}).encode()
+    if len(message) > settings.SSE_MAX_EVENT_BYTES:
+        # такая датаграмма не пройдет через сокет или застрянет у брокера
+        logger.warning('Событие %s байт для %s не отправлено: больше '
+                       'SSE_MAX_EVENT_BYTES', len(message), channels)
+        metrics.incr('events.oversized')
+        return
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _socket.setblocking(False)
+        _socket.sendto(message, settings.SSE_SOCKET)
+    except OSError:
+        # сервер не запущен или его очередь переполнена
+        pass
+
+
+def follow_token(user_id):
+    return signing.dumps(user_id, salt=TOKEN_SALT)
+
+
+def follow_user_id(token):
+    """id пользователя из подписанного токена ленты или None."""
+    try:
+        return signing.loads(token, salt=TOKEN_SALT,
+                             max_age=settings.SSE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
@@ -0,0 +1,34 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.utils.module_loading import autodiscover_modules
+
+_registry = {}
+
+PLACEHOLDER_RE = re.compile(r'<!--hole:(?P<name>[\w-]+)\?(?P<params>[^>]*)-->')
+
+
+def register(name):
+    """Регистрирует функцию, которая рендерит персональный фрагмент."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('holes')
+
+
+def placeholder(name, **params):
+    if name not in _registry:
+        raise KeyError(f'Фрагмент {name!r} не зарегистрирован')
+    return f'<!--hole:{name}?{urlencode(params)}-->'
+
+
+def fill(request, content):
+    """Подставляет персональные фрагменты на место заглушек."""
+    def render(match):
+        func = _registry[match.group('name')]
+        return func(request, **dict(parse_qsl(match.group('params'))))
+    return PLACEHOLDER_RE.sub(render, content)
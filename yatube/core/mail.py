@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics
+from .models import QueuedEmail
+from .taskqueue import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Складывает письма в очередь в БД вместо отправки в запросе."""
+
+    def send_messages(self, email_messages):
+        queued = [QueuedEmail.from_message(message)
+                  for message in email_messages if message.recipients()]
+        QueuedEmail.objects.bulk_create(queued)
+        metrics.incr('mail.queued', len(queued))
+        if queued:
+            schedule_drain()
+        return len(queued)
+
+
+def schedule_drain():
+    """
+    Ставит отправку очереди на конец текущего окна.
+
+    Все письма окна MAIL_QUEUE_DRAIN_SECONDS получают одну задачу с общим
+    ключом, и пачка писем не запускает столько же параллельных отправок.
+    """
+    from .tasks import send_queued_mail_task
+    window = settings.MAIL_QUEUE_DRAIN_SECONDS
+    slot = int(timezone.now().timestamp() // window + 1) * window
+    enqueue(send_queued_mail_task, priority=10,
+            run_at=datetime.fromtimestamp(slot, tz=timezone.utc),
+            idempotency_key=f'{send_queued_mail_task.task_name}:drain@{slot}')
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.MAIL_QUEUE_RETRY_SECONDS
+                     * 2 ** (attempts - 1))
+
+
+def claim(batch_size):
+    """
+    Забирает письма себе: статус SENDING с арендой в next_attempt.
+
+    Письмо достается только тому воркеру, чей UPDATE его изменил, а письма
+    упавшего воркера возвращаются в работу, когда аренда истекает.
+    """
+    now = timezone.now()
+    due = (Q(status=QueuedEmail.QUEUED) | Q(status=QueuedEmail.SENDING),
+           Q(next_attempt__lte=now))
+    candidates = (QueuedEmail.objects.filter(*due)
+                  .values_list('pk', flat=True)[:batch_size])
+    lease = now + timedelta(seconds=settings.MAIL_QUEUE_LEASE_SECONDS)
+    claimed = [
+        pk for pk in candidates
+        if QueuedEmail.objects.filter(*due, pk=pk).update(
+            status=QueuedEmail.SENDING, next_attempt=lease)
+    ]
+    return list(QueuedEmail.objects.filter(pk__in=claimed))
+
+
+def record_failure(email, error):
+    """Повтор с нарастающей паузой, после MAIL_QUEUE_MAX_ATTEMPTS - ошибка."""
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.MAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = QueuedEmail.FAILED
+        metrics.incr('mail.failed')
+    else:
+        email.status = QueuedEmail.QUEUED
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+        metrics.incr('mail.retried')
+    email.save(update_fields=('attempts', 'status', 'next_attempt',
+                              'last_error'))
+
+
+def send_queued_mail(batch_size=None):
+    """Отправляет пачку писем из очереди через одно соединение."""
+    if batch_size is None:
+        batch_size = settings.MAIL_QUEUE_BATCH_SIZE
+    batch = claim(batch_size)
+    if not batch:
+        return 0
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        # без этого пачка висела бы в SENDING до конца аренды, а попытки
+        # не считались бы
+        logger.warning('Не удалось подключиться к почтовому серверу: %s',
+                       error)
+        for email in batch:
+            record_failure(email, error)
+        return 0
+    sent = 0
+    try:
+        for email in batch:
+            try:
+                connection.send_messages([email.get_message()])
+            except Exception as error:
+                logger.warning('Не удалось отправить письмо %s: %s',
+                               email.pk, error)
+                record_failure(email, error)
+                continue
+            email.attempts += 1
+            email.status = QueuedEmail.SENT
+            email.sent = timezone.now()
+            email.last_error = ''
+            email.save(update_fields=('attempts', 'status', 'sent',
+                                      'last_error'))
+            sent += 1
+    finally:
+        connection.close()
+    metrics.incr('mail.sent', sent)
+    return sent
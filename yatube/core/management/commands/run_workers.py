@@ -0,0 +1,67 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import metrics, taskqueue
+
+
+class Stopper:
+    def __init__(self):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+
+def worker_loop(poll_interval):
+    stopper = Stopper()
+    # соединение, унаследованное от родителя, использовать нельзя
+    connections.close_all()
+    while not stopper.stopping:
+        if not taskqueue.run_next():
+            time.sleep(poll_interval)
+    metrics.flush()
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=settings.TASK_WORKERS,
+                            help='Количество процессов-воркеров')
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.TASK_POLL_SECONDS,
+                            help='Пауза при пустой очереди, секунд')
+
+    def handle(self, *args, **options):
+        taskqueue.release_expired()
+        taskqueue.schedule_all_periodic()
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=worker_loop,
+                                    args=(options['poll_interval'],))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        stopper = Stopper()
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        last_release = time.monotonic()
+        while not stopper.stopping and any(w.is_alive() for w in workers):
+            time.sleep(1)
+            if time.monotonic() - last_release > settings.TASK_LEASE_SECONDS:
+                taskqueue.release_expired()
+                last_release = time.monotonic()
+        # воркеры дорабатывают текущую задачу и выходят
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
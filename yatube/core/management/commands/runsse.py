@@ -0,0 +1,64 @@
+import asyncio
+import multiprocessing
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.sse import Broker, SSEServer
+
+
+def sse_worker(sock, broker_path):
+    # соединение, унаследованное от родителя, использовать нельзя
+    connections.close_all()
+    try:
+        asyncio.run(SSEServer().serve(sock=sock, broker_path=broker_path))
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Запускает сервер Server-Sent Events с уведомлениями о новых постах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.SSE_HOST)
+        parser.add_argument('--port', type=int, default=settings.SSE_PORT)
+        parser.add_argument('--socket', default=settings.SSE_SOCKET,
+                            help='unix-сокет, куда сайт шлет события')
+        parser.add_argument('--processes', type=int,
+                            default=settings.SSE_PROCESSES,
+                            help='Процессов SSE; больше одного - через брокер')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'События: http://{options["host"]}:{options["port"]}'
+            f'{settings.SSE_PATH}, сокет {options["socket"]}')
+        if options['processes'] <= 1:
+            try:
+                asyncio.run(SSEServer().serve(
+                    options['host'], options['port'], options['socket']))
+            except KeyboardInterrupt:
+                pass
+            return
+        # общий слушающий сокет: соединения распределяет ядро
+        sock = socket.create_server((options['host'], options['port']))
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(
+                target=sse_worker,
+                args=(sock, settings.SSE_BROKER_SOCKET))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            asyncio.run(Broker().serve(options['socket'],
+                                       settings.SSE_BROKER_SOCKET))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import send_queued_mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Сколько писем отправлять за раз')
+        parser.add_argument('--loop', action='store_true',
+                            help='Работать постоянно, проверяя очередь')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Пауза между проверками пустой очереди')
+
+    def handle(self, *args, **options):
+        while True:
+            sent = send_queued_mail(options['batch_size'])
+            if sent:
+                self.stdout.write(f'Отправлено писем: {sent}')
+            if not options['loop']:
+                break
+            if not sent:
+                time.sleep(options['interval'])
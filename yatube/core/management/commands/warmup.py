@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = 'Прогревает шаблоны, маршруты и кэш страниц после деплоя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, dest='index_pages',
+                            help='Сколько страниц главной отрендерить')
+        parser.add_argument('--groups', type=int, dest='top_groups',
+                            help='Сколько крупнейших сообществ отрендерить')
+        parser.add_argument('--profiles', type=int, dest='top_profiles',
+                            help='Сколько крупнейших профилей отрендерить')
+
+    def handle(self, *args, **options):
+        result = warm_up(
+            index_pages=options['index_pages'],
+            top_groups=options['top_groups'],
+            top_profiles=options['top_profiles'],
+        )
+        self.stdout.write(
+            f'Шаблонов: {result["templates"]}, '
+            f'пространств имен URL: {result["namespaces"]}, '
+            f'страниц: {result["pages"]}'
+        )
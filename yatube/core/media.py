@@ -0,0 +1,67 @@
+import re
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+class RangeFile:
+    """
+    Файл, из которого читается только кусок [start, start + length).
+
+    fileno() оставлен, чтобы wsgi.file_wrapper сервера (например, gunicorn)
+    мог отдать кусок через sendfile: он начинает с текущей позиции файла и
+    ограничивается заголовком Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает (start, end) включительно, None, если заголовок нужно
+    проигнорировать, или False, если диапазон невыполним.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not (match['start'] or match['end']):
+        return None
+    if not match['start']:
+        suffix = int(match['end'])
+        if suffix == 0:
+            return False
+        return max(size - suffix, 0), size - 1
+    start = int(match['start'])
+    end = int(match['end']) if match['end'] else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    weak = 'W/' + etag
+    return '*' in tags or etag in tags or weak in tags
@@ -0,0 +1,58 @@
+"""
+Счетчики событий (отправленные письма, задачи, отказы по лимиту).
+
+Приращения копятся в памяти процесса и раз в METRICS_FLUSH_SECONDS
+сбрасываются в таблицу Counter, так что метрики воркеров фоновых задач
+видны всем процессам, а сброс нагрузки не пишет в БД на каждый отказ.
+"""
+import threading
+import time
+from collections import Counter as Pending
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+_pending = Pending()
+_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def incr(name, delta=1):
+    with _lock:
+        _pending[name] += delta
+        due = time.monotonic() - _flushed_at >= settings.METRICS_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def add(name, delta):
+    from .models import Counter
+
+    if Counter.objects.filter(name=name).update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(name=name, value=delta)
+    except IntegrityError:
+        # строку успел создать другой процесс
+        Counter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def flush():
+    global _flushed_at
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    for name, delta in pending.items():
+        add(name, delta)
+
+
+def values(*names):
+    from .models import Counter
+
+    flush()
+    found = dict(Counter.objects.filter(name__in=names)
+                 .values_list('name', 'value'))
+    return {name: found.get(name, 0) for name in names}
@@ -0,0 +1,162 @@
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.gzip import re_accepts_gzip
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+from . import holes, metrics, ratelimit
+from .compression import compress_bytes, compress_chunks
+from .static import serve_static
+
+
+class HolePunchMiddleware:
+    """Заполняет персональные фрагменты в общих закэшированных страницах."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (response.streaming
+                or 'text/html' not in response.get('Content-Type', '')
+                or b'<!--hole:' not in response.content):
+            return response
+        content = response.content.decode(response.charset)
+        response.content = holes.fill(request, content)
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдает собранную статику без отдельного веб-сервера."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (settings.STATIC_SERVE
+                and request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(settings.STATIC_URL)):
+            name = request.path_info[len(settings.STATIC_URL):]
+            response = serve_static(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+
+class CachedGZipMiddleware:
+    """
+    gzip-сжатие HTML и других текстовых ответов.
+
+    Обычные ответы сжимаются целиком, и сжатые тела лежат в кэше под хэшем
+    исходного: если кэш умеет хранить gzip как есть (core.cache_backends),
+    повтор отдается без пересжатия. Потоковые ответы сжимаются на лету со
+    сбросом после каждого куска. Страницы с CSRF-токеном не берутся из кэша
+    и получают случайную добавку в заголовке gzip против BREACH.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not re_accepts_gzip.search(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            return response
+        has_secret = bool(request.META.get('CSRF_COOKIE_USED'))
+        if response.streaming:
+            # что попадет в поток, заранее неизвестно - добавка всегда
+            response.streaming_content = compress_chunks(
+                response.streaming_content, settings.GZIP_LEVEL,
+                settings.GZIP_BREACH_PADDING)
+            del response['Content-Length']
+        else:
+            compressed = self.compress(response.content, has_secret)
+            if compressed is None:
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'gzip'
+        return response
+
+    def compressible(self, response):
+        content_type = response.get('Content-Type', '').split(';')[0]
+        # медиа и статика уже сжаты или отдаются по диапазонам
+        if (response.has_header('Content-Encoding')
+                or response.status_code == 206
+                or content_type not in settings.GZIP_CONTENT_TYPES):
+            return False
+        return (response.streaming
+                or len(response.content) >= settings.GZIP_MIN_LENGTH)
+
+    def compress(self, content, has_secret):
+        if has_secret:
+            compressed = compress_bytes(content, settings.GZIP_LEVEL,
+                                        settings.GZIP_BREACH_PADDING)
+            return compressed if len(compressed) < len(content) else None
+        cacheable = (hasattr(cache, 'get_gzip')
+                     and len(content) >= settings.GZIP_CACHE_MIN_LENGTH)
+        if cacheable:
+            key = f'gzip_body:{hashlib.sha1(content).hexdigest()}'
+            compressed = cache.get_gzip(key)
+            if compressed is not None:
+                return compressed
+        compressed = compress_bytes(content, settings.GZIP_LEVEL)
+        if len(compressed) >= len(content):
+            return None
+        if cacheable:
+            cache.set_gzip(key, compressed, settings.GZIP_CACHE_SECONDS,
+                           raw_length=len(content))
+        return compressed
+
+
+class RateLimitMiddleware:
+    """
+    Корзины токенов для представлений из RATE_LIMITS и сброс нагрузки.
+
+    Если запрос к такому представлению простоял в очереди дольше
+    LOAD_SHED_LATENCY_SECONDS, он сразу получает 429: записи ждут, а чтение
+    остается быстрым.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        limit = settings.RATE_LIMITS.get(view_name)
+        if limit is None:
+            return None
+        # GET таких представлений только отдает форму и токен не тратит
+        if (view_name in settings.RATE_LIMIT_UNSAFE_ONLY
+                and request.method in ('GET', 'HEAD', 'OPTIONS')):
+            return None
+        latency = ratelimit.queue_latency(request)
+        if (latency is not None
+                and latency > settings.LOAD_SHED_LATENCY_SECONDS):
+            metrics.incr('ratelimit.shed')
+            return self.too_many_requests(
+                request, settings.LOAD_SHED_RETRY_AFTER)
+        key = f'ratelimit:{view_name}:{ratelimit.client_key(request)}'
+        wait = ratelimit.take(key, *limit)
+        if wait:
+            metrics.incr('ratelimit.limited')
+            return self.too_many_requests(request, math.ceil(wait))
+        return None
+
+    def too_many_requests(self, request, retry_after):
+        response = render(request, 'core/429.html',
+                          {'retry_after': retry_after}, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,154 @@
+import pickle
+
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedEmail(models.Model):
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    recipients = models.TextField(verbose_name='Получатели')
+    message = models.BinaryField(verbose_name='Письмо')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    next_attempt = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Следующая попытка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+    sent = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата отправки'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    class Meta:
+        ordering = ('next_attempt',)
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt'],
+                         name='queued_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+    @classmethod
+    def from_message(cls, message):
+        connection, message.connection = message.connection, None
+        try:
+            data = pickle.dumps(message)
+        finally:
+            message.connection = connection
+        return cls(
+            subject=message.subject[:255],
+            recipients=', '.join(message.recipients()),
+            message=data,
+        )
+
+    def get_message(self):
+        return pickle.loads(self.message)
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(max_length=200, verbose_name='Задача')
+    arguments = models.TextField(default='{}', verbose_name='Аргументы')
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    run_at = models.DateTimeField(default=timezone.now,
+                                  verbose_name='Запустить после')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name='Максимум попыток'
+    )
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        blank=True,
+        null=True,
+        verbose_name='Ключ идемпотентности'
+    )
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Заблокирована до'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='Дата создания')
+    finished = models.DateTimeField(blank=True, null=True,
+                                    verbose_name='Дата завершения')
+
+    class Meta:
+        ordering = ('-priority', 'run_at')
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(fields=['status', '-priority', 'run_at'],
+                         name='task_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Counter(models.Model):
+    """
+    Счетчик в БД, общий для всех процессов.
+
+    Кэш LocMem у каждого процесса свой, поэтому то, что пишут воркеры
+    фоновых задач (метрики, сверенные количества), хранится здесь.
+    """
+    name = models.CharField(max_length=100, primary_key=True,
+                            verbose_name='Имя')
+    value = models.BigIntegerField(default=0, verbose_name='Значение')
+
+    class Meta:
+        verbose_name = 'Счетчик'
+        verbose_name_plural = 'Счетчики'
+
+    def __str__(self):
+        return f'{self.name} = {self.value}'
@@ -0,0 +1,196 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def where_sql(queryset):
+    query = queryset.query
+    if not query.where:
+        return None
+    compiler = query.get_compiler(queryset.db)
+    try:
+        return query.where.as_sql(compiler, compiler.connection)
+    except EmptyResultSet:
+        return ()
+
+
+def only_default_filter(queryset):
+    """
+    Выборка не сужена ничем, кроме фильтра менеджера по умолчанию
+    (например, скрытия удаленных постов).
+    """
+    default = queryset.model._default_manager.all()
+    return where_sql(queryset) == where_sql(default)
+
+
+def estimate_count(queryset):
+    """
+    Оценка числа строк по статистике БД для запросов без фильтров.
+
+    Для SQLite берется sqlite_stat1, который заполняет ANALYZE. Если
+    статистики нет, возвращается None и считать придется честно. Фильтр
+    менеджера по умолчанию оценке не мешает: скрытых строк мало, и оценка
+    лишь немного завышена.
+    """
+    if (not isinstance(queryset, QuerySet)
+            or not only_default_filter(queryset)):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'sqlite':
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    return int(row[0].split()[0]) if row else None
+
+
+def count_cache_key(queryset):
+    sql = str(queryset.query).encode()
+    return f'paginator_count:{hashlib.md5(sql).hexdigest()}'
+
+
+def bump_count(key, delta):
+    """Поправляет закэшированное количество, если оно уже есть в кэше."""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def stored_count(key):
+    """Количество, сверенное фоновой задачей и записанное в БД."""
+    from .models import Counter
+
+    return (Counter.objects.filter(name=key)
+            .values_list('value', flat=True).first())
+
+
+def cached_count(queryset, key=None):
+    """
+    Количество из кэша, из сверенного счетчика в БД, оценка по статистике
+    или честный COUNT(*).
+    """
+    key = key or count_cache_key(queryset)
+    value = cache.get(key)
+    if value is None:
+        value = stored_count(key)
+        if value is None:
+            value = estimate_count(queryset)
+        if value is None:
+            value = queryset.count()
+        cache.set(key, value, settings.PAGINATOR_COUNT_SECONDS)
+    return max(value, 0)
+
+
+class ChainedSequence:
+    """
+    Две выборки подряд для пагинатора: сначала first, затем second.
+
+    Срез читает вторую выборку, только когда первая закончилась, поэтому
+    страницы из начала не трогают вторую таблицу вовсе.
+    """
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    @staticmethod
+    def length(sequence):
+        if isinstance(sequence, QuerySet):
+            return sequence.count()
+        return len(sequence)
+
+    def count(self):
+        return self.length(self.first) + self.length(self.second)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop
+        items = list(self.first[start:stop])
+        if stop is not None and len(items) == stop - start:
+            return items
+        first_count = start + len(items) if items else self.length(self.first)
+        offset = max(start - first_count, 0)
+        if stop is None:
+            return items + list(self.second[offset:])
+        return items + list(
+            self.second[offset:offset + stop - start - len(items)])
+
+
+ELLIPSIS = '…'
+
+
+def elided_page_range(paginator, number=1, on_each_side=None, on_ends=None):
+    """Номера страниц вокруг текущей и по краям, с пропусками."""
+    if on_each_side is None:
+        on_each_side = settings.PAGINATOR_ON_EACH_SIDE
+    if on_ends is None:
+        on_ends = settings.PAGINATOR_ON_ENDS
+    number = paginator.validate_number(number)
+    num_pages = paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        yield from paginator.page_range
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который не считает COUNT(*) на каждый запрос.
+
+    Количество берется из переданного count, из кэша по count_key
+    (его поправляют сигналы) или оценивается по статистике БД.
+    """
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, count_key=None, count=None):
+        super().__init__(object_list, per_page, orphans,
+                         allow_empty_first_page)
+        self.count_key = count_key
+        self.known_count = count
+
+    def exact_count(self):
+        return Paginator.count.func(self)
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if not isinstance(self.object_list, QuerySet):
+            return self.exact_count()
+        return cached_count(self.object_list, self.count_key)
+
+    def page(self, number):
+        if self.orphans:
+            return super().page(number)
+        # количество может быть приблизительным, поэтому срез им не обрезаем
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
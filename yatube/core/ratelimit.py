@@ -0,0 +1,61 @@
+"""
+Ограничение частоты запросов к изменяющим представлениям.
+
+У каждой пары «представление + пользователь (или IP)» своя корзина токенов
+в кэше RATE_LIMIT_CACHE: запрос забирает токен, токены восполняются с
+постоянной скоростью. Состояние читается и пишется без блокировки, поэтому при гонке
+двух процессов пропустить лишний запрос можно, а отказать зря - нельзя.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return f'ip:{forwarded.split(",")[0].strip()}'
+    return f'ip:{request.META.get("REMOTE_ADDR", "")}'
+
+
+def take(key, capacity, rate, now=None):
+    """
+    Забирает токен из корзины. Возвращает 0, если токен был, иначе
+    сколько секунд ждать следующего.
+    """
+    now = time.time() if now is None else now
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    state = cache.get(key)
+    tokens, updated = state if state else (capacity, now)
+    tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+    # корзина наполнится целиком - хранить ее дальше незачем
+    timeout = math.ceil(capacity / rate)
+    if tokens < 1:
+        cache.set(key, (tokens, now), timeout)
+        return (1 - tokens) / rate
+    cache.set(key, (tokens - 1, now), timeout)
+    return 0
+
+
+def queue_latency(request, now=None):
+    """
+    Сколько секунд запрос ждал в очереди перед воркером, по заголовку
+    X-Request-Start от прокси (t=<секунды>, миллисекунды или микросекунды).
+    """
+    header = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        start = float(header.strip().lstrip('t='))
+    except ValueError:
+        return None
+    if start > 1e14:
+        start /= 1e6
+    elif start > 1e11:
+        start /= 1e3
+    now = time.time() if now is None else now
+    return max(now - start, 0)
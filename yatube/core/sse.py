@@ -0,0 +1,286 @@
+"""
+Сервер Server-Sent Events на asyncio.
+
+Каждое соединение - одна корутина и небольшая очередь, поэтому один
+процесс держит тысячи простаивающих клиентов. События приходят от процессов
+сайта датаграммами (core.events.publish) и раздаются через Hub подписчикам
+каналов: posts - все посты, group:<id> - сообщество, author:<id> - автор
+(лента подписок подписывается на всех своих авторов), comments:<id> -
+новые комментарии к посту.
+
+Если процессов SSE несколько, датаграммы принимает Broker и пересылает
+каждую всем процессам по unix-сокету, так что любой из них раздает событие
+своим клиентам без обращений к базе.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .events import follow_user_id
+
+logger = logging.getLogger(__name__)
+
+PUBLIC_CHANNEL = re.compile(r'^(posts|group:\d+|comments:\d+)$')
+
+
+class Hub:
+    """Подписки соединений на каналы внутри процесса."""
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+
+    def subscribe(self, channels, queue):
+        for channel in channels:
+            self.subscribers[channel].add(queue)
+
+    def unsubscribe(self, channels, queue):
+        for channel in channels:
+            queues = self.subscribers.get(channel)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[channel]
+
+    def publish(self, channels, message):
+        # пост из сообщества и от автора доходит до клиента один раз
+        queues = set()
+        for channel in channels:
+            queues.update(self.subscribers.get(channel, ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                pass
+        return len(queues)
+
+
+def parse_event(data):
+    try:
+        message = json.loads(data)
+        return message.pop('channels'), message
+    except (ValueError, KeyError, TypeError, AttributeError):
+        logger.warning('Некорректное событие: %r', data[:100])
+        return None, None
+
+
+class Receiver(asyncio.DatagramProtocol):
+    def __init__(self, on_event):
+        self.on_event = on_event
+
+    def datagram_received(self, data, addr):
+        self.on_event(data)
+
+
+def bind_datagram_socket(path):
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    return sock
+
+
+class Broker:
+    """Пересылает события сайта всем подключенным процессам SSE."""
+
+    def __init__(self):
+        self.writers = set()
+
+    def relay(self, data):
+        if len(data) > settings.SSE_MAX_EVENT_BYTES:
+            logger.warning('Событие %s байт не переслано', len(data))
+            return
+        for writer in list(self.writers):
+            # отстающий процесс отключается, чтобы не копить память
+            if (writer.transport.get_write_buffer_size()
+                    > settings.SSE_BROKER_BUFFER):
+                writer.close()
+                self.writers.discard(writer)
+                continue
+            writer.write(data.rstrip(b'\n') + b'\n')
+
+    async def handle(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            await reader.read()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def serve(self, socket_path, broker_path):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: Receiver(self.relay),
+            sock=bind_datagram_socket(socket_path))
+        if os.path.exists(broker_path):
+            os.unlink(broker_path)
+        server = await asyncio.start_unix_server(self.handle, broker_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            transport.close()
+            for path in (socket_path, broker_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+
+
+def follow_channels(user_id):
+    from posts.models import Follow
+
+    close_old_connections()
+    authors = Follow.objects.filter(user_id=user_id).values_list(
+        'author_id', flat=True)
+    return [f'author:{author_id}' for author_id in authors]
+
+
+class SSEServer:
+    def __init__(self, hub=None):
+        self.hub = hub or Hub()
+
+    async def resolve_channels(self, params):
+        channels = [channel for channel in params.get('channel', ())
+                    if PUBLIC_CHANNEL.match(channel)]
+        for token in params.get('follow', ()):
+            user_id = follow_user_id(token)
+            if user_id is not None:
+                loop = asyncio.get_running_loop()
+                channels += await loop.run_in_executor(
+                    None, follow_channels, user_id)
+        return channels
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        return method, urlsplit(target)
+
+    def write_head(self, writer, status, content_type='text/plain'):
+        lines = [
+            f'HTTP/1.1 {status}',
+            f'Content-Type: {content_type}; charset=utf-8',
+            'Cache-Control: no-cache',
+            # nginx не должен буферизовать поток
+            'X-Accel-Buffering: no',
+        ]
+        if settings.SSE_ALLOW_ORIGIN:
+            lines.append(
+                f'Access-Control-Allow-Origin: {settings.SSE_ALLOW_ORIGIN}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+
+    async def handle(self, reader, writer):
+        channels = []
+        queue = asyncio.Queue(settings.SSE_QUEUE_SIZE)
+        try:
+            method, url = await asyncio.wait_for(
+                self.read_request(reader), settings.SSE_HEARTBEAT_SECONDS)
+            if method != 'GET' or url.path != settings.SSE_PATH:
+                self.write_head(writer, '404 Not Found')
+                return
+            channels = await self.resolve_channels(parse_qs(url.query))
+            if not channels:
+                self.write_head(writer, '400 Bad Request')
+                return
+            self.write_head(writer, '200 OK', 'text/event-stream')
+            writer.write(f'retry: {settings.SSE_RETRY_MS}\n\n'.encode())
+            self.hub.subscribe(channels, queue)
+            await self.stream(queue, writer)
+        except (ConnectionError, asyncio.TimeoutError, ValueError,
+                asyncio.CancelledError):
+            # клиент ушел, прислал мусор или сервер останавливается
+            pass
+        finally:
+            self.hub.unsubscribe(channels, queue)
+            writer.close()
+
+    async def stream(self, queue, writer):
+        """
+        Шлет количество новых постов с момента подключения и готовые
+        фрагменты новых комментариев.
+        """
+        count = 0
+        while True:
+            await writer.drain()
+            try:
+                message = await asyncio.wait_for(
+                    queue.get(), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # комментарий-пинг заодно выявляет отключившихся клиентов
+                writer.write(b': ping\n\n')
+                continue
+            messages = [message]
+            while not queue.empty():
+                messages.append(queue.get_nowait())
+            new_posts = 0
+            for message in messages:
+                if 'html' in message:
+                    data = ''.join(f'data: {line}\n' for line
+                                   in message['html'].splitlines() or [''])
+                    writer.write(f'event: comment\n{data}\n'.encode())
+                else:
+                    new_posts += 1
+            if new_posts:
+                count += new_posts
+                writer.write(f'event: posts\ndata: {count}\n\n'.encode())
+
+    def publish(self, data):
+        channels, message = parse_event(data)
+        if channels is not None:
+            self.hub.publish(channels, message)
+
+    async def listen(self, path):
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: Receiver(self.publish), sock=bind_datagram_socket(path))
+        return transport
+
+    async def follow_broker(self, broker_path):
+        """Читает события от брокера, переподключаясь при обрыве."""
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    broker_path, limit=settings.SSE_MAX_EVENT_BYTES * 2)
+            except OSError:
+                await asyncio.sleep(1)
+                continue
+            try:
+                async for line in reader:
+                    self.publish(line)
+            except (ConnectionError, ValueError,
+                    asyncio.LimitOverrunError) as error:
+                # слишком длинная строка ломает поток - подключаемся заново
+                logger.warning('Поток брокера прерван: %s', error)
+            finally:
+                writer.close()
+            await asyncio.sleep(1)
+
+    async def serve(self, host=None, port=None, socket_path=None,
+                    broker_path=None, sock=None):
+        if broker_path:
+            feeder = asyncio.ensure_future(self.follow_broker(broker_path))
+        else:
+            feeder = await self.listen(socket_path)
+        if sock is not None:
+            server = await asyncio.start_server(self.handle, sock=sock)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if broker_path:
+                feeder.cancel()
+            else:
+                feeder.close()
+                if os.path.exists(socket_path):
+                    os.unlink(socket_path)
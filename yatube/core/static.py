@@ -0,0 +1,65 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+# ManifestStaticFilesStorage добавляет в имя первые 12 символов md5
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(request):
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def find_static_file(name):
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except (SuspiciousFileOperation, ValueError):
+        return None
+    return path if os.path.isfile(path) else None
+
+
+def serve_static(request, name):
+    """Отдает собранный файл статики, выбирая сжатую копию по заголовкам."""
+    path = find_static_file(name)
+    if path is None:
+        return None
+    stat = os.stat(path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(path)
+    accepted = accepted_encodings(request)
+    encoding = None
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, coding
+            break
+    response = FileResponse(open(path, 'rb'))
+    # FileResponse угадал бы тип по имени сжатой копии (.gz), задаем сами
+    response['Content-Type'] = content_type or 'application/octet-stream'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME_RE.search(name):
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable')
+    else:
+        response['Cache-Control'] = f'public, max-age={settings.STATIC_MAX_AGE}'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
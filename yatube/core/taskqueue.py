@@ -0,0 +1,202 @@
+import json
+import logging
+import os
+import traceback
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def autodiscover():
+    autodiscover_modules('tasks')
+
+
+def task(name=None, every=None, max_attempts=None, priority=0, lease=None):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    every - период в секундах для задач, которые воркеры запускают сами.
+    lease - сколько секунд задача может выполняться, прежде чем ее сочтут
+    брошенной и отдадут другому воркеру.
+    """
+    def decorator(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.every = every
+        func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        func.priority = priority
+        func.lease = lease or settings.TASK_LEASE_SECONDS
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def get_task(name):
+    return _registry[name]
+
+
+def enqueue(func, *args, priority=None, run_at=None, delay=None,
+            idempotency_key=None, **kwargs):
+    """
+    Ставит задачу в очередь.
+
+    Повторная постановка с тем же idempotency_key возвращает уже
+    существующую задачу.
+    """
+    if isinstance(func, str):
+        func = get_task(func)
+    if run_at is None:
+        run_at = timezone.now()
+    if delay:
+        run_at += timedelta(seconds=delay)
+    fields = {
+        'name': func.task_name,
+        'arguments': json.dumps({'args': args, 'kwargs': kwargs}),
+        'priority': func.priority if priority is None else priority,
+        'run_at': run_at,
+        'max_attempts': func.max_attempts,
+    }
+    if idempotency_key is None:
+        return Task.objects.create(**fields)
+    try:
+        with transaction.atomic():
+            return Task.objects.create(idempotency_key=idempotency_key,
+                                       **fields)
+    except IntegrityError:
+        return Task.objects.get(idempotency_key=idempotency_key)
+
+
+def schedule_periodic(func, after=None):
+    """Ставит следующий запуск периодической задачи, если его еще нет."""
+    now = (after or timezone.now()).timestamp()
+    slot = int(now // func.every + 1) * func.every
+    run_at = datetime.fromtimestamp(slot, tz=timezone.utc)
+    return enqueue(func, run_at=run_at,
+                   idempotency_key=f'{func.task_name}@{slot}')
+
+
+def schedule_all_periodic():
+    for func in _registry.values():
+        if func.every:
+            schedule_periodic(func)
+
+
+def release_expired():
+    """
+    Возвращает в очередь задачи воркеров, которые не дожили до конца.
+
+    Задачи, исчерпавшие попытки, помечаются ошибочными: иначе задача,
+    которая каждый раз роняет воркер, крутилась бы в очереди вечно.
+    """
+    now = timezone.now()
+    expired = Task.objects.filter(status=Task.RUNNING, locked_until__lt=now)
+    exhausted = expired.filter(attempts__gte=F('max_attempts'))
+    names = set(exhausted.values_list('name', flat=True))
+    failed = exhausted.update(
+        status=Task.FAILED,
+        finished=now,
+        locked_until=None,
+        last_error='Истек срок блокировки: воркер не завершил задачу'
+    )
+    if failed:
+        metrics.incr('tasks.failed', failed)
+        logger.error('Задач с истекшей блокировкой и без попыток: %s', failed)
+    # периодическую задачу, как и в execute, планируем заново
+    for name in names:
+        func = _registry.get(name)
+        if func is not None and func.every:
+            schedule_periodic(func)
+    return expired.update(status=Task.PENDING, locked_until=None)
+
+
+def prune_finished():
+    """Удаляет завершенные задачи старше TASK_RETENTION_DAYS."""
+    border = timezone.now() - timedelta(days=settings.TASK_RETENTION_DAYS)
+    deleted, _ = Task.objects.filter(
+        status__in=(Task.DONE, Task.FAILED),
+        finished__lt=border
+    ).delete()
+    return deleted
+
+
+def claim():
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.PENDING,
+        run_at__lte=now
+    ).values_list('id', 'name')[:settings.TASK_CLAIM_BATCH]
+    for task_id, name in candidates:
+        func = _registry.get(name)
+        lease = func.lease if func else settings.TASK_LEASE_SECONDS
+        claimed = Task.objects.filter(id=task_id, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=lease)
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def execute(task_obj):
+    func = _registry.get(task_obj.name)
+    try:
+        if func is None:
+            raise LookupError(f'Задача {task_obj.name} не зарегистрирована')
+        arguments = json.loads(task_obj.arguments)
+        func(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        task_obj.last_error = traceback.format_exc()
+        if func is None or task_obj.attempts >= task_obj.max_attempts:
+            task_obj.status = Task.FAILED
+            task_obj.finished = timezone.now()
+            metrics.incr('tasks.failed')
+            logger.error('Задача %s (%s) не выполнена', task_obj.pk,
+                         task_obj.name)
+        else:
+            delay = settings.TASK_RETRY_SECONDS * 2 ** (task_obj.attempts - 1)
+            task_obj.status = Task.PENDING
+            task_obj.run_at = timezone.now() + timedelta(seconds=delay)
+            metrics.incr('tasks.retried')
+    else:
+        task_obj.status = Task.DONE
+        task_obj.finished = timezone.now()
+        task_obj.last_error = ''
+        metrics.incr('tasks.done')
+    task_obj.locked_until = None
+    # пишем, только если задачу не забрал другой воркер после истечения
+    # блокировки: иначе затрем статус его запуска
+    owned = Task.objects.filter(
+        pk=task_obj.pk,
+        status=Task.RUNNING,
+        attempts=task_obj.attempts
+    ).update(status=task_obj.status, run_at=task_obj.run_at,
+             finished=task_obj.finished, last_error=task_obj.last_error,
+             locked_until=None)
+    if not owned:
+        logger.warning('Задача %s (%s) выполнялась дольше блокировки',
+                       task_obj.pk, task_obj.name)
+        return task_obj.status
+    if func is not None and func.every and task_obj.status != Task.PENDING:
+        schedule_periodic(func)
+    return task_obj.status
+
+
+def run_next():
+    """Выполняет одну готовую задачу. Возвращает False, если их нет."""
+    task_obj = claim()
+    if task_obj is None:
+        return False
+    logger.debug('Воркер %s выполняет задачу %s', os.getpid(), task_obj.pk)
+    execute(task_obj)
+    return True
@@ -0,0 +1,17 @@
+from django.conf import settings
+
+from .mail import send_queued_mail
+from .taskqueue import prune_finished, task
+
+
+@task(name='core.send_queued_mail', every=settings.MAIL_QUEUE_INTERVAL,
+      lease=settings.TASK_LONG_LEASE_SECONDS)
+def send_queued_mail_task():
+    # отправляем, пока очередь не опустеет
+    while send_queued_mail():
+        pass
+
+
+@task(name='core.prune_tasks', every=settings.TASK_PRUNE_INTERVAL)
+def prune_tasks():
+    prune_finished()
@@ -0,0 +1,11 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag
+def hole(name, **params):
+    return mark_safe(holes.placeholder(name, **params))
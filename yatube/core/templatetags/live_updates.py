@@ -0,0 +1,31 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.conf import settings
+
+from core.events import follow_token
+
+register = template.Library()
+
+
+@register.inclusion_tag('core/new_posts_notice.html', takes_context=True)
+def new_posts_notice(context, channel, object_id=None):
+    """Плашка «N новых постов» с подпиской на события канала."""
+    if channel == 'follow':
+        user = context['request'].user
+        if not user.is_authenticated:
+            return {'url': None}
+        params = {'follow': follow_token(user.pk)}
+    elif object_id is not None:
+        params = {'channel': f'{channel}:{object_id}'}
+    else:
+        params = {'channel': channel}
+    return {'url': f'{settings.SSE_URL}?{urlencode(params)}'}
+
+
+@register.inclusion_tag('core/live_comments.html')
+def live_comments(post_id):
+    """Подписка на новые комментарии к посту: они вставляются в начало
+    ближайшего предыдущего блока data-comments."""
+    params = {'channel': f'comments:{post_id}'}
+    return {'url': f'{settings.SSE_URL}?{urlencode(params)}'}
@@ -0,0 +1,15 @@
+from django import template
+
+from core.paginator import ELLIPSIS, elided_page_range
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    return list(elided_page_range(page.paginator, page.number))
+
+
+@register.filter
+def is_ellipsis(value):
+    return value == ELLIPSIS
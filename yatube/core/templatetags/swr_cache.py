@@ -0,0 +1,65 @@
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template import (
+    Library, Node, TemplateSyntaxError, VariableDoesNotExist,
+)
+
+from core.cache import get_or_refresh
+
+register = Library()
+
+
+class SWRCacheNode(Node):
+    def __init__(self, nodelist, expire_time_var, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.expire_time_var = expire_time_var
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            expire_time = int(self.expire_time_var.resolve(context))
+        except (VariableDoesNotExist, ValueError, TypeError):
+            raise TemplateSyntaxError(
+                '"swrcache" tag got an invalid timeout: %r'
+                % self.expire_time_var.var)
+        try:
+            fragment_cache = caches['template_fragments']
+        except InvalidCacheBackendError:
+            fragment_cache = caches['default']
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        cache_key = make_template_fragment_key(self.fragment_name, vary_on)
+        return get_or_refresh(
+            cache_key,
+            lambda: self.nodelist.render(context),
+            expire_time,
+            cache=fragment_cache,
+        )
+
+
+@register.tag('swrcache')
+def do_swrcache(parser, token):
+    """
+    Аналог {% cache %}, который не допускает одновременного пересчета
+    фрагмента несколькими воркерами и отдает устаревшее значение,
+    пока свежее готовится.
+
+    Использование::
+
+        {% load swr_cache %}
+        {% swrcache [expire_time] [fragment_name] [var1] [var2] .. %}
+            .. дорогой рендеринг ..
+        {% endswrcache %}
+    """
+    nodelist = parser.parse(('endswrcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise TemplateSyntaxError(
+            "'%r' tag requires at least 2 arguments." % tokens[0])
+    return SWRCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
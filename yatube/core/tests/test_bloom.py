@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase
+
+from ..bloom import BloomFilter
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_members_are_found(self):
+        """Добавленные элементы всегда находятся, а чужие - почти никогда"""
+        bloom = BloomFilter.build(range(0, 2000, 2), error_rate=0.01)
+        self.assertTrue(all(item in bloom for item in range(0, 2000, 2)))
+        false_positives = sum(item in bloom for item in range(1, 2000, 2))
+        self.assertLess(false_positives, 30)
+
+    def test_round_trip(self):
+        """Фильтр переживает сериализацию в байты"""
+        bloom = BloomFilter(capacity=4)
+        for item in range(1, 5):
+            bloom.add(item)
+        restored = BloomFilter.from_bytes(bloom.to_bytes())
+        self.assertEqual(restored.count, 4)
+        self.assertEqual(restored.data, bloom.data)
+        self.assertIn(4, restored)
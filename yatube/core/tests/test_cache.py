@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.cache import get_or_refresh, lock_key
+
+
+@override_settings(CACHE_EARLY_REFRESH_BETA=0)
+class GetOrRefreshTest(TestCase):
+    key = 'test_swr_key'
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return f'value {self.calls}'
+
+    def test_value_is_cached(self):
+        """Свежее значение не пересчитывается"""
+        self.assertEqual(get_or_refresh(self.key, self.compute, 20),
+                         'value 1')
+        self.assertEqual(get_or_refresh(self.key, self.compute, 20),
+                         'value 1')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_value_while_other_worker_refreshes(self):
+        """Пока другой воркер пересчитывает значение, отдается старое"""
+        cache.set(self.key, ('old value', 0, 0))
+        cache.add(lock_key(self.key), True)
+        self.assertEqual(get_or_refresh(self.key, self.compute, 20),
+                         'old value')
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_value_is_refreshed(self):
+        """Устаревшее значение пересчитывает получивший блокировку"""
+        cache.set(self.key, ('old value', 0, 0))
+        self.assertEqual(get_or_refresh(self.key, self.compute, 20),
+                         'value 1')
+        self.assertIsNone(cache.get(lock_key(self.key)))
+
+    @override_settings(CACHE_LOCK_SECONDS=0.2, CACHE_LOCK_POLL_SECONDS=0.01)
+    def test_waits_for_value_when_nothing_to_serve(self):
+        """Без старого значения воркер ждет чужой пересчет"""
+        cache.add(lock_key(self.key), True)
+
+        def other_worker_finished(seconds):
+            cache.set(self.key, ('value from other worker', 0, 0))
+
+        with mock.patch('core.cache.time.sleep', other_worker_finished):
+            self.assertEqual(get_or_refresh(self.key, self.compute, 20),
+                             'value from other worker')
+        self.assertEqual(self.calls, 0)
@@ -0,0 +1,82 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.cache_backends import RAW, ZLIB, CompressedLocMemCache
+
+User = get_user_model()
+
+
+class CompressedLocMemCacheTest(TestCase):
+    def setUp(self) -> None:
+        self.cache = CompressedLocMemCache(
+            'compressed-test', {'OPTIONS': {'COMPRESS_MIN_LENGTH': 100}})
+        self.cache.clear()
+
+    def stored(self, key):
+        return LocMemCache.get(self.cache, key)
+
+    def test_small_values_are_not_compressed(self):
+        """Маленькие значения хранятся без сжатия"""
+        self.cache.set('small', {'a': 1})
+        self.assertEqual(self.stored('small')[0], RAW)
+        self.assertEqual(self.cache.get('small'), {'a': 1})
+
+    def test_large_values_are_compressed(self):
+        """Крупные значения сжимаются и прозрачно распаковываются"""
+        html = '<article>Текст поста</article>' * 200
+        self.cache.set('page', html)
+        stored = self.stored('page')
+        self.assertEqual(stored[0], ZLIB)
+        self.assertLess(len(stored), len(html))
+        self.assertEqual(self.cache.get('page'), html)
+        self.assertEqual(self.cache.get_many(['page']), {'page': html})
+
+    def test_incr_keeps_working(self):
+        """Счетчики хранятся как числа и увеличиваются атомарно"""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.cache.get('counter'), 3)
+
+    def test_gzip_body_is_served_as_is(self):
+        """gzip-тело отдается без распаковки и учитывается в статистике"""
+        body = b'<p>page</p>' * 100
+        compressed = gzip.compress(body)
+        self.cache.set_gzip('body', compressed, raw_length=len(body))
+        self.assertEqual(self.cache.get_gzip('body'), compressed)
+        self.assertEqual(self.cache.get('body'), body)
+        self.assertIsNone(self.cache.get_gzip('missing'))
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertGreater(stats['compression_ratio'], 1)
+
+
+class CachedGZipMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_compressed_body_is_reused(self):
+        """Повторный ответ берет сжатое тело из кэша"""
+        url = reverse('posts:main_page')
+        first = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        second = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertIn(b'<html', gzip.decompress(second.content))
+        self.assertGreaterEqual(cache.stats()['hits'], 1)
+
+    def test_stats_view_for_staff(self):
+        """Статистика кэша доступна только персоналу"""
+        url = reverse('cache_stats')
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_rate', response.json())
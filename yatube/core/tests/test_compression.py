@@ -0,0 +1,68 @@
+import gzip
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+
+from core.compression import compress_bytes, compress_chunks, gzip_header
+from core.middleware import CachedGZipMiddleware
+
+HTML = b'<article><p>Card text</p></article>' * 50
+
+
+class CompressionTest(TestCase):
+    def test_chunks_form_valid_gzip(self):
+        """Поток сжатых кусков - корректный gzip с любой добавкой"""
+        chunks = [HTML[:100], b'', HTML[100:]]
+        for padding in (0, 32):
+            with self.subTest(padding=padding):
+                body = b''.join(compress_chunks(chunks, padding=padding))
+                self.assertEqual(gzip.decompress(body), HTML)
+
+    def test_each_chunk_is_flushed(self):
+        """После каждого куска данные сбрасываются клиенту"""
+        parts = list(compress_chunks([b'first ' * 10, b'second ' * 10]))
+        # заголовок, два сброшенных куска и завершение потока
+        self.assertEqual(len(parts), 4)
+
+    def test_padding_length_varies(self):
+        """Длина добавки в заголовке случайна"""
+        lengths = {len(gzip_header(32)) for _ in range(50)}
+        self.assertGreater(len(lengths), 1)
+        self.assertEqual(len(gzip_header(0)), 10)
+
+
+class CachedGZipMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def process(self, response, **meta):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        request.META.update(meta)
+        return CachedGZipMiddleware(lambda request: response)(request)
+
+    def test_streaming_html_is_compressed(self):
+        """Потоковый HTML сжимается без Content-Length"""
+        response = self.process(StreamingHttpResponse(
+            iter([HTML, HTML]), content_type='text/html'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), HTML * 2)
+
+    def test_media_is_not_compressed(self):
+        """Картинки и частичные ответы не сжимаются"""
+        image = self.process(HttpResponse(HTML, content_type='image/png'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+        partial = HttpResponse(HTML, content_type='text/html', status=206)
+        self.assertFalse(self.process(partial).has_header('Content-Encoding'))
+
+    def test_csrf_pages_are_not_reused(self):
+        """Страница с CSRF-токеном сжимается заново и не кэшируется"""
+        response = self.process(HttpResponse(HTML), CSRF_COOKIE_USED=True)
+        self.assertEqual(gzip.decompress(response.content), HTML)
+        self.assertEqual(cache.stats()['entries'], 0)
+        response = self.process(HttpResponse(HTML))
+        self.assertEqual(response.content, compress_bytes(HTML))
+        self.assertEqual(cache.stats()['entries'], 1)
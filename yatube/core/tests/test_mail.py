@@ -0,0 +1,89 @@
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.test import TestCase, override_settings
+
+from core import metrics
+from core.mail import claim, send_queued_mail
+from core.models import QueuedEmail, Task
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class UnreachableBackend(BaseEmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('Соединение отклонено')
+
+    def send_messages(self, email_messages):
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class QueuedEmailTest(TestCase):
+    def test_mail_is_queued_then_sent(self):
+        """Письмо попадает в очередь и отправляется воркером"""
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.recipients, 'to@example.com')
+        sent_before = metrics.values('mail.sent')['mail.sent']
+        self.assertEqual(send_queued_mail(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedEmail.SENT)
+        self.assertEqual(metrics.values('mail.sent')['mail.sent'],
+                         sent_before + 1)
+
+    @override_settings(QUEUED_EMAIL_BACKEND=f'{__name__}.FailingBackend',
+                       MAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_failed_mail_is_retried(self):
+        """Неотправленное письмо откладывается, а потом помечается
+        ошибочным"""
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.assertEqual(send_queued_mail(), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.status, QueuedEmail.QUEUED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('SMTP', queued.last_error)
+        QueuedEmail.objects.update(next_attempt=queued.created)
+        send_queued_mail()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, QueuedEmail.FAILED)
+
+    @override_settings(QUEUED_EMAIL_BACKEND=f'{__name__}.UnreachableBackend')
+    def test_unreachable_server_releases_batch(self):
+        """Если сервер недоступен, пачка возвращается в очередь с
+        отсрочкой"""
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.assertEqual(send_queued_mail(), 0)
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.status, QueuedEmail.QUEUED)
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('отклонено', queued.last_error)
+        self.assertGreater(queued.next_attempt, queued.created)
+
+    def test_burst_schedules_one_drain(self):
+        """Пачка писем ставит одну задачу отправки, а не по одной на письмо"""
+        for number in range(3):
+            mail.send_mail(f'Тема {number}', 'Текст', 'from@example.com',
+                           ['to@example.com'])
+        self.assertEqual(
+            Task.objects.filter(name='core.send_queued_mail').count(), 1)
+
+    def test_claimed_mail_is_not_sent_twice(self):
+        """Письма, взятые одним воркером, другому не достаются"""
+        mail.send_mail('Тема', 'Текст', 'from@example.com',
+                       ['to@example.com'])
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+        self.assertEqual(send_queued_mail(), 0)
+        self.assertEqual(len(mail.outbox), 0)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from http import HTTPStatus
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+CONTENT = bytes(range(256)) * 4
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ServeMediaTest(TestCase):
+    url = '/media/posts/picture.jpg'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'picture.jpg')
+        with open(path, 'wb') as f:
+            f.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_full_file(self):
+        """Файл отдается целиком с ETag и поддержкой Range"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+
+    def test_range_request(self):
+        """По заголовку Range отдается только запрошенный кусок"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, HTTPStatus.PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(b''.join(response.streaming_content),
+                         CONTENT[10:20])
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content),
+                         CONTENT[-5:])
+
+    def test_unsatisfiable_range(self):
+        """Диапазон за пределами файла дает 416"""
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code,
+                         HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='x-accel-redirect')
+    def test_accel_redirect(self):
+        """В режиме X-Accel-Redirect файл отдает веб-сервер"""
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/posts/picture.jpg')
+        self.assertEqual(response.content, b'')
+
+    def test_path_outside_media_root(self):
+        """Файлы вне MEDIA_ROOT не отдаются"""
+        response = self.client.get('/media/../manage.py')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase
+
+from core.paginator import (
+    ELLIPSIS, CachedCountPaginator, ChainedSequence, bump_count,
+    elided_page_range, estimate_count,
+)
+from core.models import Counter
+from posts.models import Post
+from posts.stats import ALL_POSTS_COUNT_KEY
+from posts.tasks import reconcile_posts_count
+
+User = get_user_model()
+
+
+class CachedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='paginator_author')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Пост {number}')
+            for number in range(5)
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_count_is_cached_by_key(self):
+        """Количество считается один раз и дальше берется из кэша"""
+        posts = Post.objects.all()
+        paginator = CachedCountPaginator(posts, 2, count_key='test_count')
+        self.assertEqual(paginator.count, 5)
+        with self.assertNumQueries(1):
+            page = CachedCountPaginator(
+                posts, 2, count_key='test_count').page(1)
+            self.assertEqual(len(page), 2)
+        bump_count('test_count', 1)
+        self.assertEqual(
+            CachedCountPaginator(posts, 2, count_key='test_count').count, 6)
+
+    def test_reconciled_count_is_shared(self):
+        """Количество, сверенное воркером, берется из БД без COUNT(*)"""
+        reconcile_posts_count()
+        self.assertEqual(Counter.objects.get(name=ALL_POSTS_COUNT_KEY).value,
+                         5)
+        Counter.objects.filter(name=ALL_POSTS_COUNT_KEY).update(value=7)
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 2, count_key=ALL_POSTS_COUNT_KEY)
+        self.assertEqual(paginator.count, 7)
+
+    def test_estimate_ignores_visibility_filter(self):
+        """Фильтр скрытых постов не отключает оценку по статистике"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post.objects.all()), 5)
+        self.assertIsNone(
+            estimate_count(Post.objects.filter(author=self.user)))
+
+    def test_stale_count_does_not_truncate_page(self):
+        """Устаревшее количество не обрезает страницу"""
+        paginator = CachedCountPaginator(
+            Post.objects.all(), 10, count=3)
+        self.assertEqual(len(paginator.page(1)), 5)
+
+    def test_elided_page_range(self):
+        """Номера страниц выводятся окном вокруг текущей"""
+        paginator = Paginator(range(1000), 10)
+        self.assertEqual(
+            list(elided_page_range(paginator, 50, 2, 1)),
+            [1, ELLIPSIS, 48, 49, 50, 51, 52, ELLIPSIS, 100])
+        self.assertEqual(
+            list(elided_page_range(paginator, 1, 2, 1)),
+            [1, 2, 3, ELLIPSIS, 100])
+
+
+class ChainedSequenceTest(TestCase):
+    def test_slices_span_both_sequences(self):
+        """Срезы идут по первой выборке и продолжаются во второй"""
+        chain = ChainedSequence(list(range(3)), list(range(10, 14)))
+        self.assertEqual(chain[0:2], [0, 1])
+        self.assertEqual(chain[2:5], [2, 10, 11])
+        self.assertEqual(chain[5:9], [12, 13])
+        self.assertEqual(chain[4], 11)
@@ -0,0 +1,87 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import Post
+
+User = get_user_model()
+
+
+class TokenBucketTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_bucket_refills(self):
+        """Токены кончаются и восполняются со временем"""
+        now = 1000.0
+        self.assertEqual(ratelimit.take('bucket', 2, 0.5, now), 0)
+        self.assertEqual(ratelimit.take('bucket', 2, 0.5, now), 0)
+        self.assertEqual(ratelimit.take('bucket', 2, 0.5, now), 2)
+        self.assertEqual(ratelimit.take('bucket', 2, 0.5, now + 2), 0)
+
+    def test_queue_latency_formats(self):
+        """Заголовок X-Request-Start понимается в разных единицах"""
+        factory = RequestFactory()
+        now = 1600000010.0
+        for header in ('t=1600000000', '1600000000000', 't=1600000000000000'):
+            with self.subTest(header=header):
+                request = factory.get('/', HTTP_X_REQUEST_START=header)
+                self.assertAlmostEqual(
+                    ratelimit.queue_latency(request, now), 10)
+        self.assertIsNone(ratelimit.queue_latency(factory.get('/'), now))
+
+
+@override_settings(RATE_LIMITS={'posts:dislike_post': (2, 0.01)})
+class RateLimitMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.user = User.objects.create(username='liker')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:dislike_post',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_too_many_writes(self):
+        """Сверх лимита запись получает 429 с Retry-After, чтение - нет"""
+        for _ in range(2):
+            self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '100')
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_limits_are_per_user(self):
+        """Лимит одного пользователя не мешает другому"""
+        for _ in range(3):
+            self.client.get(self.url)
+        self.client.force_login(self.author)
+        self.assertNotEqual(self.client.get(self.url).status_code, 429)
+
+    @override_settings(RATE_LIMITS={'posts:post_create': (1, 0.01)})
+    def test_form_get_is_not_limited(self):
+        """Открытие формы поста не тратит токены и не сбрасывается"""
+        url = reverse('posts:post_create')
+        start = f't={time.time() - 10:.3f}'
+        for _ in range(3):
+            response = self.client.get(url, HTTP_X_REQUEST_START=start)
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post(url, HTTP_X_REQUEST_START=start)
+        self.assertEqual(response.status_code, 429)
+
+    def test_load_shedding(self):
+        """Запись, долго ждавшая в очереди, сразу получает 429"""
+        start = f't={time.time() - 10:.3f}'
+        response = self.client.get(self.url, HTTP_X_REQUEST_START=start)
+        self.assertEqual(response.status_code, 429)
+        response = self.client.get(reverse('posts:main_page'),
+                                   HTTP_X_REQUEST_START=start)
+        self.assertEqual(response.status_code, 200)
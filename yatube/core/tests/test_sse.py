@@ -0,0 +1,207 @@
+import asyncio
+import os
+from unittest import mock
+import socket
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import events
+from core.sse import Broker, Hub, SSEServer, follow_channels
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class HubTest(TestCase):
+    def test_post_is_delivered_once(self):
+        """Пост из нескольких каналов доходит до подписчика один раз"""
+        hub = Hub()
+        queue = asyncio.Queue()
+        hub.subscribe(['posts', 'group:1'], queue)
+        self.assertEqual(hub.publish(['posts', 'group:1'], {'post': 1}), 1)
+        self.assertEqual(queue.qsize(), 1)
+        hub.unsubscribe(['posts', 'group:1'], queue)
+        self.assertEqual(hub.publish(['posts'], {'post': 2}), 0)
+        self.assertEqual(dict(hub.subscribers), {})
+
+    def test_follow_token(self):
+        """Лента подписок подписывается на авторов по токену"""
+        reader = User.objects.create(username='reader')
+        author = User.objects.create(username='author')
+        Follow.objects.create(user=reader, author=author)
+        token = events.follow_token(reader.pk)
+        self.assertEqual(events.follow_user_id(token), reader.pk)
+        self.assertIsNone(events.follow_user_id(token + 'x'))
+        self.assertEqual(follow_channels(reader.pk), [f'author:{author.pk}'])
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=5)
+class SSEServerTest(TestCase):
+    def test_new_posts_are_counted(self):
+        """Клиент получает число новых постов, пришедших через сокет"""
+        socket_path = os.path.join(tempfile.mkdtemp(), 'sse.sock')
+
+        async def scenario():
+            server = SSEServer()
+            transport = await server.listen(socket_path)
+            http = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+            port = http.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /events/?channel=group:7 HTTP/1.1\r\n\r\n')
+            head = await reader.readuntil(b'\n\n')
+            sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            for post_id in (1, 2):
+                sender.sendto(
+                    b'{"channels": ["group:7"], "post": %d}' % post_id,
+                    socket_path)
+            sender.close()
+            event = await reader.readuntil(b'\n\n')
+            while not event.endswith(b'data: 2\n\n'):
+                event = await reader.readuntil(b'\n\n')
+            writer.close()
+            http.close()
+            await http.wait_closed()
+            transport.close()
+            return head, event
+
+        head, event = asyncio.run(asyncio.wait_for(scenario(), 10))
+        self.assertIn(b'text/event-stream', head)
+        self.assertEqual(event, b'event: posts\ndata: 2\n\n')
+
+    def test_broker_fans_out_to_every_process(self):
+        """Брокер отдает комментарий всем процессам SSE"""
+        directory = tempfile.mkdtemp()
+        socket_path = os.path.join(directory, 'sse.sock')
+        broker_path = os.path.join(directory, 'broker.sock')
+
+        async def subscribe(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /events/?channel=comments:3 HTTP/1.1\r\n\r\n')
+            # заголовки и строка retry
+            await reader.readuntil(b'\n\n')
+            return reader, writer
+
+        async def scenario():
+            broker = Broker()
+            broker_task = asyncio.ensure_future(
+                broker.serve(socket_path, broker_path))
+            workers, ports = [], []
+            for _ in range(2):
+                server = SSEServer()
+                feeder = asyncio.ensure_future(
+                    server.follow_broker(broker_path))
+                http = await asyncio.start_server(
+                    server.handle, '127.0.0.1', 0)
+                workers.append((feeder, http))
+                ports.append(http.sockets[0].getsockname()[1])
+            clients = [await subscribe(port) for port in ports]
+            while len(broker.writers) < 2:
+                await asyncio.sleep(0.05)
+            sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sender.sendto(b'{"channels": ["comments:3"], "comment": 1, '
+                          b'"html": "<p>one</p>\\n<p>two</p>"}', socket_path)
+            sender.close()
+            events = [await reader.readuntil(b'\n\n')
+                      for reader, _ in clients]
+            for _, writer in clients:
+                writer.close()
+            for feeder, http in workers:
+                feeder.cancel()
+                http.close()
+            broker_task.cancel()
+            return events
+
+        events = asyncio.run(asyncio.wait_for(scenario(), 10))
+        self.assertEqual(
+            events,
+            [b'event: comment\ndata: <p>one</p>\ndata: <p>two</p>\n\n'] * 2)
+
+    @override_settings(SSE_MAX_EVENT_BYTES=1024)
+    def test_follower_survives_overlong_line(self):
+        """Слишком длинная строка от брокера не останавливает раздачу"""
+        broker_path = os.path.join(tempfile.mkdtemp(), 'broker.sock')
+        lines = [b'x' * 4096 + b'\n',
+                 b'{"channels": ["posts"], "post": 1}\n']
+
+        async def feed(reader, writer):
+            writer.write(lines.pop(0))
+            await writer.drain()
+            await reader.read()
+
+        async def scenario():
+            broker = await asyncio.start_unix_server(feed, broker_path)
+            server = SSEServer()
+            queue = asyncio.Queue()
+            server.hub.subscribe(['posts'], queue)
+            feeder = asyncio.ensure_future(server.follow_broker(broker_path))
+            message = await queue.get()
+            feeder.cancel()
+            broker.close()
+            return message
+
+        with self.assertLogs('core.sse', 'WARNING'):
+            message = asyncio.run(asyncio.wait_for(scenario(), 10))
+        self.assertEqual(message, {'post': 1})
+
+    def test_unknown_channel_is_rejected(self):
+        """Без допустимых каналов соединение не открывается"""
+        async def scenario():
+            http = await asyncio.start_server(
+                SSEServer().handle, '127.0.0.1', 0)
+            port = http.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /events/?channel=secret HTTP/1.1\r\n\r\n')
+            response = await reader.read()
+            http.close()
+            await http.wait_closed()
+            return response
+
+        response = asyncio.run(asyncio.wait_for(scenario(), 10))
+        self.assertTrue(response.startswith(b'HTTP/1.1 400'))
+
+
+class PublishTest(TestCase):
+    @override_settings(SSE_MAX_EVENT_BYTES=100)
+    def test_oversized_event_is_not_sent(self):
+        """Слишком большое событие не отправляется и учитывается"""
+        sender = mock.Mock()
+        with mock.patch('core.events._socket', sender), \
+                self.assertLogs('core.events', 'WARNING'):
+            events.publish(['posts'], html='x' * 200)
+            events.publish(['posts'], post=1)
+        self.assertEqual(sender.sendto.call_count, 1)
+
+
+class NewCommentEventTest(TestCase):
+    def test_comment_is_published_rendered(self):
+        """Новый комментарий публикуется готовым фрагментом"""
+        author = User.objects.create(username='author')
+        post = Post.objects.create(author=author, text='Пост')
+        with mock.patch('posts.signals.transaction.on_commit',
+                        lambda callback: callback()), \
+                mock.patch('posts.signals.events.publish') as publish:
+            comment = Comment.objects.create(
+                post=post, author=author, text='Живой комментарий')
+        publish.assert_called_once()
+        args, kwargs = publish.call_args
+        self.assertEqual(args[0], [f'comments:{post.pk}'])
+        self.assertEqual(kwargs['comment'], comment.pk)
+        self.assertIn('Живой комментарий', kwargs['html'])
+
+
+class NewPostsNoticeTest(TestCase):
+    def test_pages_subscribe_to_channels(self):
+        """Ленты подписываются на свои каналы событий"""
+        group = Group.objects.create(title='Группа', slug='group')
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'data-url="/events/?channel=posts"')
+        response = self.client.get(
+            reverse('posts:group_list_page', kwargs={'slug': group.slug}))
+        self.assertContains(
+            response, f'data-url="/events/?channel=group%3A{group.pk}"')
+        self.client.force_login(User.objects.create(username='reader'))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'data-url="/events/?follow=')
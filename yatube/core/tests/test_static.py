@@ -0,0 +1,66 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+CSS = b'body { color: black; }\n' * 50
+
+
+class CompressedStaticTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+        cls.settings_override = override_settings(
+            STATICFILES_DIRS=[cls.source],
+            STATIC_ROOT=cls.root,
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'),
+            STATIC_SERVE=True,
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed_name = next(
+            name for name in os.listdir(os.path.join(cls.root, 'css'))
+            if name.startswith('site.') and name.endswith('.css')
+            and name != 'site.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_collectstatic_writes_gzip_copy(self):
+        """collectstatic кладет сжатую копию рядом с хэшированным файлом"""
+        path = os.path.join(self.root, 'css', self.hashed_name + '.gz')
+        with open(path, 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+
+    def test_hashed_file_served_compressed_and_immutable(self):
+        """Хэшированный файл отдается сжатым и кэшируется навсегда"""
+        response = self.client.get(
+            f'/static/css/{self.hashed_name}',
+            HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_plain_file_for_client_without_gzip(self):
+        """Без поддержки gzip клиент получает исходный файл"""
+        response = self.client.get('/static/css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response.streaming_content), CSS)
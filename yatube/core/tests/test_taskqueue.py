@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import taskqueue
+from core.models import Task
+
+calls = []
+
+
+@taskqueue.task(name='tests.record')
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@taskqueue.task(name='tests.broken', max_attempts=2)
+def broken():
+    raise RuntimeError('Ошибка задачи')
+
+
+@taskqueue.task(name='tests.long', lease=3600)
+def long_task():
+    calls.append('long')
+
+
+@taskqueue.task(name='tests.periodic', every=60)
+def periodic():
+    calls.append('periodic')
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self) -> None:
+        calls.clear()
+
+    def test_task_runs_with_arguments(self):
+        """Задача выполняется воркером с переданными аргументами"""
+        task = taskqueue.enqueue(record, 'значение', suffix='!')
+        self.assertTrue(taskqueue.run_next())
+        self.assertEqual(calls, ['значение!'])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertFalse(taskqueue.run_next())
+
+    def test_priority_and_schedule(self):
+        """Сначала выполняются приоритетные задачи, отложенные ждут"""
+        taskqueue.enqueue(record, 'обычная')
+        taskqueue.enqueue(record, 'срочная', priority=5)
+        taskqueue.enqueue(record, 'отложенная', delay=60)
+        while taskqueue.run_next():
+            pass
+        self.assertEqual(calls, ['срочная', 'обычная'])
+
+    def test_idempotency_key(self):
+        """Задача с тем же ключом ставится в очередь один раз"""
+        first = taskqueue.enqueue(record, 1, idempotency_key='only-once')
+        second = taskqueue.enqueue(record, 2, idempotency_key='only-once')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    @override_settings(TASK_RETRY_SECONDS=0)
+    def test_failed_task_is_retried(self):
+        """Упавшая задача повторяется, затем помечается ошибочной"""
+        task = taskqueue.enqueue(broken)
+        taskqueue.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertIn('Ошибка задачи', task.last_error)
+        taskqueue.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+
+    def test_expired_lock_is_released(self):
+        """Задачу умершего воркера снова можно взять в работу"""
+        task = taskqueue.enqueue(record, 'снова')
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.RUNNING,
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(taskqueue.run_next())
+        self.assertEqual(taskqueue.release_expired(), 1)
+        self.assertTrue(taskqueue.run_next())
+
+    def test_expired_lock_without_attempts_fails(self):
+        """Задача, исчерпавшая попытки, после истечения блокировки
+        помечается ошибочной"""
+        task = taskqueue.enqueue(broken)
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.RUNNING,
+            attempts=2,
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(taskqueue.release_expired(), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertIsNotNone(task.finished)
+        self.assertFalse(taskqueue.run_next())
+
+    def test_lease_is_set_per_task(self):
+        """Долгая задача блокируется на собственный срок"""
+        task = taskqueue.enqueue(long_task)
+        claimed = taskqueue.claim()
+        self.assertEqual(claimed.pk, task.pk)
+        self.assertGreater(claimed.locked_until,
+                           timezone.now() + timedelta(minutes=59))
+
+    def test_stale_run_does_not_overwrite_new_one(self):
+        """Запуск, у которого истекла блокировка, не затирает статус
+        повторного запуска"""
+        taskqueue.enqueue(record, 'долго')
+        stale = taskqueue.claim()
+        Task.objects.filter(pk=stale.pk).update(
+            status=Task.RUNNING, attempts=stale.attempts + 1)
+        taskqueue.execute(stale)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Task.RUNNING)
+        self.assertEqual(calls, ['долго'])
+
+    def test_periodic_task_reschedules_itself(self):
+        """Периодическая задача после выполнения планирует следующий
+        запуск"""
+        task = taskqueue.enqueue(periodic)
+        taskqueue.run_next()
+        next_run = Task.objects.exclude(pk=task.pk).get()
+        self.assertEqual(next_run.name, 'tests.periodic')
+        self.assertGreater(next_run.run_at, timezone.now())
+        self.assertEqual(next_run.run_at.timestamp() % 60, 0)
+
+    def test_old_finished_tasks_are_pruned(self):
+        """Старые завершенные задачи удаляются, остальные остаются"""
+        old = timezone.now() - timedelta(days=30)
+        done = taskqueue.enqueue(record, 'старая')
+        failed = taskqueue.enqueue(record, 'упавшая')
+        fresh = taskqueue.enqueue(record, 'свежая')
+        pending = taskqueue.enqueue(record, 'ждет')
+        Task.objects.filter(pk=done.pk).update(status=Task.DONE, finished=old)
+        Task.objects.filter(pk=failed.pk).update(status=Task.FAILED,
+                                                 finished=old)
+        Task.objects.filter(pk=fresh.pk).update(status=Task.DONE,
+                                                finished=timezone.now())
+        self.assertEqual(taskqueue.prune_finished(), 2)
+        self.assertQuerysetEqual(
+            Task.objects.order_by('pk').values_list('pk', flat=True),
+            [fresh.pk, pending.pk], transform=int)
@@ -0,0 +1,30 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class WarmupCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='warm_author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='warm-group', description='Описание')
+        Post.objects.create(author=cls.user, group=cls.group, text='Пост')
+
+    def test_warmup_fills_index_cache(self):
+        """Команда warmup заранее кэширует страницы главной"""
+        cache.clear()
+        out = StringIO()
+        call_command('warmup', pages=2, stdout=out)
+        self.assertIsNotNone(
+            cache.get(make_template_fragment_key('index_page', [1])))
+        self.assertIn('страниц: 4', out.getvalue())
@@ -1,4 +1,20 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+    JsonResponse,
+)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .media import RangeFile, etag_matches, file_etag, parse_range
 
 
 def page_not_found(request, exception):
@@ -11,3 +27,73 @@ def csrf_failure(request, reason=''):
 
 def error_500(request, reason=''):
     return render(request, 'core/500.html')
+
+
+@staff_member_required
+def cache_stats(request):
+    """Память и попадания кэша текущего процесса."""
+    if not hasattr(cache, 'stats'):
+        raise Http404('Кэш не собирает статистику')
+    return JsonResponse(cache.stats())
+
+
+def accel_response(path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_ACCEL_REDIRECT == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+    else:
+        response['X-Sendfile'] = safe_join(settings.MEDIA_ROOT, path)
+    return response
+
+
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except (SuspiciousFileOperation, ValueError):
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # веб-сервер сам отдаст файл, включая Range и условные запросы
+        return accel_response(path, content_type)
+
+    stat = os.stat(full_path)
+    etag = file_etag(stat)
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if etag_matches(if_none_match, etag) or (
+            not if_none_match and not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                stat.st_mtime, stat.st_size)):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and (not if_range or if_range == etag):
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1))
+        response.status_code = 206
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Type'] = content_type
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
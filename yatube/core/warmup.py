@@ -0,0 +1,91 @@
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.db.models import Count
+from django.template import engines
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve, reverse
+
+from posts.models import GroupStats, User
+
+logger = logging.getLogger(__name__)
+
+
+def template_names():
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith('.html'):
+                        path = os.path.join(root, filename)
+                        yield os.path.relpath(path, directory)
+
+
+def preload_templates():
+    names = set(template_names())
+    for name in names:
+        get_template(name)
+    return len(names)
+
+
+def populate_resolver():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    for namespace in settings.WARMUP_URL_NAMESPACES:
+        _, namespace_resolver = resolver.namespace_dict[namespace]
+        namespace_resolver.reverse_dict
+    return len(settings.WARMUP_URL_NAMESPACES)
+
+
+def warmup_paths(index_pages, top_groups, top_profiles):
+    main_page = reverse('posts:main_page')
+    for number in range(1, index_pages + 1):
+        yield f'{main_page}?page={number}'
+    slugs = (GroupStats.objects
+             .values_list('group__slug', flat=True)[:top_groups])
+    for slug in slugs:
+        yield reverse('posts:group_list_page', kwargs={'slug': slug})
+    usernames = (User.objects
+                 .annotate(posts_total=Count('posts'))
+                 .order_by('-posts_total')
+                 .values_list('username', flat=True)[:top_profiles])
+    for username in usernames:
+        yield reverse('posts:profile', kwargs={'username': username})
+
+
+def prerender(paths):
+    factory = RequestFactory()
+    rendered = 0
+    for path in paths:
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(request.path_info)
+        func, args, kwargs = request.resolver_match
+        response = func(request, *args, **kwargs)
+        if response.status_code == 200:
+            rendered += 1
+        else:
+            logger.warning('Прогрев %s вернул %s', path,
+                           response.status_code)
+    return rendered
+
+
+def warm_up(index_pages=None, top_groups=None, top_profiles=None):
+    """Готовит процесс к первым запросам после деплоя."""
+    if index_pages is None:
+        index_pages = settings.WARMUP_INDEX_PAGES
+    if top_groups is None:
+        top_groups = settings.WARMUP_TOP_GROUPS
+    if top_profiles is None:
+        top_profiles = settings.WARMUP_TOP_PROFILES
+    connection.ensure_connection()
+    return {
+        'templates': preload_templates(),
+        'namespaces': populate_resolver(),
+        'pages': prerender(
+            warmup_paths(index_pages, top_groups, top_profiles)),
+    }
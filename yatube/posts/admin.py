@@ -1,21 +1,39 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Likes
+from core.admin import CachedCountAdmin, SoftDeleteAdmin
 
+from .models import Post, Group, Comment, CommentLike, PostLike
+from .purge import soft_delete_post
 
-class PostAdmin(admin.ModelAdmin):
+
+class PostAdmin(SoftDeleteAdmin, CachedCountAdmin):
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'is_hidden',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_hidden')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
     empty_value_display = '-пусто-'
 
+    def soft_delete(self, obj):
+        soft_delete_post(obj)
+
+    def get_queryset(self, request):
+        # скрытые посты, ждущие очистки, в админке тоже видны
+        queryset = Post.all_objects.all()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
@@ -23,29 +41,42 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
+    search_fields = ('title', 'slug')
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(CachedCountAdmin):
     list_display = (
         'post',
         'text',
         'author',
         'created',
     )
+    list_select_related = ('post', 'author')
+    list_filter = ('created',)
+    raw_id_fields = ('post', 'author')
 
 
-class LikesAdmin(admin.ModelAdmin):
+class PostLikeAdmin(CachedCountAdmin):
     list_display = (
         'user',
         'post',
+    )
+    list_select_related = ('user', 'post')
+    raw_id_fields = ('user', 'post')
+
+
+class CommentLikeAdmin(CachedCountAdmin):
+    list_display = (
+        'user',
         'comment',
-        'created'
     )
-    empty_value_display = '-пусто-'
+    list_select_related = ('user', 'comment')
+    raw_id_fields = ('user', 'comment')
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
-admin.site.register(Likes, LikesAdmin)
+admin.site.register(PostLike, PostLikeAdmin)
+admin.site.register(CommentLike, CommentLikeAdmin)
@@ -0,0 +1,106 @@
+"""
+Перенос старых постов в архивные таблицы.
+
+Лента, группы и подсчеты работают только с горячей таблицей posts_post,
+а профиль и страница поста дочитывают архив. Посты переносятся порциями:
+каждая порция - отдельная транзакция вместе с комментариями и лайками.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (ArchivedComment, ArchivedLike, ArchivedPost, Comment,
+                     CommentLike, Likes, Post, PostLike)
+from .stats import archived_posts_changed
+
+
+def archive_cutoff(days=None):
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size=None):
+    """Переносит одну порцию постов старше cutoff, возвращает их число."""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    with transaction.atomic():
+        posts = list(Post.objects
+                     .filter(pub_date__lt=cutoff)
+                     .order_by('pk')[:batch_size])
+        if not posts:
+            return 0
+        ids = [post.pk for post in posts]
+        comments = list(Comment.objects.filter(post_id__in=ids))
+        post_likes = PostLike.objects.filter(post_id__in=ids)
+        comment_likes = CommentLike.objects.filter(comment__post_id__in=ids)
+        # лайки, которые split_likes еще не перенес
+        legacy_likes = Likes.objects.filter(
+            Q(post_id__in=ids) | Q(comment__post_id__in=ids))
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(id=post.pk, text=post.text, pub_date=post.pub_date,
+                         author_id=post.author_id, group_id=post.group_id,
+                         image=post.image.name)
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(id=comment.pk, post_id=comment.post_id,
+                            author_id=comment.author_id, text=comment.text,
+                            created=comment.created)
+            for comment in comments
+        )
+        ArchivedLike.objects.bulk_create(
+            [ArchivedLike(user_id=like.user_id, post_id=like.post_id)
+             for like in post_likes]
+            + [ArchivedLike(user_id=like.user_id, comment_id=like.comment_id)
+               for like in comment_likes]
+            + [ArchivedLike(user_id=like.user_id, post_id=like.post_id,
+                            comment_id=like.comment_id, created=like.created)
+               for like in legacy_likes]
+        )
+        # лайки из старой таблицы счетчик поста не учитывал
+        archived_counts = (ArchivedLike.objects
+                           .filter(post=OuterRef('pk'))
+                           .values('post')
+                           .annotate(total=Count('*'))
+                           .values('total'))
+        ArchivedPost.objects.filter(pk__in=ids).update(
+            likes_count=Coalesce(Subquery(archived_counts), 0))
+        post_likes.delete()
+        comment_likes.delete()
+        legacy_likes.delete()
+        Comment.objects.filter(post_id__in=ids).delete()
+        # сигналы удаления поправят счетчики и статистику горячих постов
+        Post.objects.filter(pk__in=ids).delete()
+        authors = Counter(post.author_id for post in posts)
+        for author_id, archived in authors.items():
+            archived_posts_changed(author_id, archived)
+    return len(posts)
+
+
+def archive_posts(cutoff=None, batch_size=None):
+    cutoff = cutoff or archive_cutoff()
+    total = 0
+    while True:
+        archived = archive_batch(cutoff, batch_size)
+        if not archived:
+            return total
+        total += archived
+
+
+def get_post(post_id):
+    """
+    Пост из горячей таблицы или, если его там нет, из архива.
+
+    Архивные посты удаленного пользователя не показываются, пока фоновая
+    задача их не вычистила: горячие к этому времени уже скрыты.
+    """
+    post = (Post.objects.select_related('author', 'group')
+            .filter(pk=post_id).first())
+    if post is None:
+        post = (ArchivedPost.objects.select_related('author', 'group')
+                .filter(pk=post_id, author__is_active=True).first())
+    return post
@@ -0,0 +1,68 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+CARD_TEMPLATE = 'posts/includes/post_include.html'
+
+
+def version_key(kind, pk):
+    return f'post_card_version:{kind}:{pk}'
+
+
+def invalidate(kind, pk):
+    """Сбрасывает версию, от которой зависят закэшированные карточки."""
+    cache.delete(version_key(kind, pk))
+
+
+def get_versions(posts):
+    keys = set()
+    for post in posts:
+        keys.add(version_key('post', post.pk))
+        keys.add(version_key('user', post.author_id))
+        if post.group_id:
+            keys.add(version_key('group', post.group_id))
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex[:12] for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, settings.CARD_CACHE_SECONDS)
+        versions.update(missing)
+    return versions
+
+
+def card_key(post, versions, show_group, show_author):
+    return ':'.join((
+        'post_card',
+        str(post.pk),
+        # id может повториться после очистки БД, дата публикации - нет
+        str(post.pub_date.timestamp()),
+        f'{int(show_group)}{int(show_author)}',
+        versions[version_key('post', post.pk)],
+        versions[version_key('user', post.author_id)],
+        versions.get(version_key('group', post.group_id), ''),
+    ))
+
+
+def render_cards(posts, show_group=True, show_author=True):
+    """Возвращает html карточек постов, рендеря только недостающие."""
+    posts = list(posts)
+    if not posts:
+        return []
+    versions = get_versions(posts)
+    keys = [card_key(post, versions, show_group, show_author)
+            for post in posts]
+    cards = cache.get_many(keys)
+    rendered = {}
+    template = get_template(CARD_TEMPLATE)
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            rendered[key] = template.render({
+                'post': post,
+                'show_group': show_group,
+                'show_author': show_author,
+            })
+    if rendered:
+        cache.set_many(rendered, settings.CARD_CACHE_SECONDS)
+        cards.update(rendered)
+    return [cards[key] for key in keys]
@@ -0,0 +1,117 @@
+"""
+Лента подписок, собранная при чтении (fan-out on read).
+
+У каждого автора в кэше лежит список последних постов - пары
+(время публикации, id) по убыванию. Лента - это слияние этих списков
+кучей (heapq.merge), после которого строки постов на страницу читаются
+одним запросом id__in. Так подписчики тысяч авторов не гоняют огромный
+JOIN по Follow.
+"""
+import heapq
+from itertools import islice, takewhile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Follow, Post
+
+
+def timeline_key(author_id):
+    return f'timeline:author:{author_id}'
+
+
+def invalidate_timeline(author_id):
+    cache.delete(timeline_key(author_id))
+
+
+def load_timelines(author_ids):
+    """
+    Последние FEED_TIMELINE_LENGTH постов каждого автора одним запросом.
+
+    Лишние строки отсекает ROW_NUMBER() в самой БД: фильтровать по оконной
+    функции Django 2.2 не умеет, поэтому внешний запрос написан вручную.
+    """
+    timelines = {author_id: [] for author_id in author_ids}
+    ranked = (Post.objects
+              .filter(author_id__in=author_ids)
+              .annotate(position=Window(
+                  RowNumber(),
+                  partition_by=[F('author_id')],
+                  order_by=[F('pub_date').desc(), F('id').desc()]))
+              .values('id', 'author_id', 'pub_date', 'position'))
+    sql, params = ranked.query.sql_with_params()
+    rows = Post.objects.raw(
+        f'SELECT id, author_id, pub_date FROM ({sql}) ranked '
+        f'WHERE ranked.position <= %s '
+        f'ORDER BY author_id, pub_date DESC, id DESC',
+        (*params, settings.FEED_TIMELINE_LENGTH)
+    )
+    for post in rows.iterator():
+        timelines[post.author_id].append(
+            (post.pub_date.timestamp(), post.pk))
+    return timelines
+
+
+def get_timelines(author_ids):
+    keys = {timeline_key(author_id): author_id for author_id in author_ids}
+    cached = cache.get_many(keys)
+    timelines = {keys[key]: timeline for key, timeline in cached.items()}
+    missing = [author_id for author_id in author_ids
+               if author_id not in timelines]
+    for start in range(0, len(missing), settings.FEED_LOAD_CHUNK):
+        loaded = load_timelines(missing[start:start + settings.FEED_LOAD_CHUNK])
+        cache.set_many(
+            {timeline_key(author_id): timeline
+             for author_id, timeline in loaded.items()},
+            settings.FEED_TIMELINE_SECONDS
+        )
+        timelines.update(loaded)
+    return timelines.values()
+
+
+def merged_post_ids(author_ids, limit):
+    """
+    id постов ленты по убыванию даты, не больше limit.
+
+    Лента автора, обрезанная до FEED_TIMELINE_LENGTH, ничего не знает о
+    постах старше своей последней записи. Поэтому слияние останавливается
+    на самой свежей из последних записей обрезанных лент: дальше в ленте
+    пропали бы посты этих авторов.
+    """
+    timelines = list(get_timelines(author_ids))
+    cutoff = max((tuple(timeline[-1]) for timeline in timelines
+                  if len(timeline) >= settings.FEED_TIMELINE_LENGTH),
+                 default=None)
+    merged = heapq.merge(*timelines, reverse=True)
+    if cutoff is not None:
+        merged = takewhile(lambda entry: tuple(entry) >= cutoff, merged)
+    return [post_id for _, post_id in islice(merged, limit)]
+
+
+class HydratedFeed:
+    """Последовательность постов для пагинатора по готовому списку id."""
+    def __init__(self, post_ids):
+        self.post_ids = post_ids
+
+    def count(self):
+        return len(self.post_ids)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ids = self.post_ids[index]
+        posts = (Post.objects.select_related('author', 'group')
+                 .in_bulk(ids))
+        # скрытые и удаленные после сборки ленты просто пропускаются
+        return [posts[post_id] for post_id in ids if post_id in posts]
+
+
+def follow_feed(user_id):
+    author_ids = list(Follow.objects.filter(user_id=user_id)
+                      .values_list('author_id', flat=True))
+    return HydratedFeed(merged_post_ids(author_ids, settings.FEED_MAX_POSTS))
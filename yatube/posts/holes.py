@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from core import holes
+
+from . import membership
+from .models import Follow, PostLike, Recommendation
+
+
+@holes.register('switcher')
+def switcher(request):
+    return render_to_string(
+        'posts/includes/switcher.html', request=request)
+
+
+@holes.register('like_button')
+def like_button(request, post_id):
+    user = request.user
+    # отрицательный ответ фильтра Блума избавляет от запроса к базе
+    liked = (user.is_authenticated
+             and membership.might_contain('likes', user.pk, post_id)
+             and PostLike.objects.filter(post_id=post_id, user=user).exists())
+    return render_to_string(
+        'posts/includes/like_button.html',
+        {'post_id': post_id, 'liked': liked},
+        request
+    )
+
+
+@holes.register('follow_button')
+def follow_button(request, author_id, username):
+    user = request.user
+    if not user.is_authenticated or str(user.pk) == author_id:
+        return ''
+    following = (
+        membership.might_contain('follows', user.pk, author_id)
+        and Follow.objects.filter(user=user, author_id=author_id).exists()
+    )
+    return render_to_string(
+        'posts/includes/follow_button.html',
+        {'username': username, 'following': following},
+        request
+    )
+
+
+@holes.register('who_to_follow')
+def who_to_follow(request):
+    user = request.user
+    if not user.is_authenticated:
+        return ''
+    recommendations = (Recommendation.objects
+                       .filter(user=user)
+                       .select_related('author')
+                       [:settings.RECOMMENDATIONS_ON_PROFILE])
+    return render_to_string(
+        'posts/includes/who_to_follow.html',
+        {'recommendations': recommendations},
+        request
+    )
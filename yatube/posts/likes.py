@@ -0,0 +1,71 @@
+"""
+Перенос лайков из общей таблицы Likes в PostLike и CommentLike.
+
+Основной перенос делает миграция 0025 до того, как новый код начнет
+читать раздельные таблицы. Команда split_likes дочищает строки, которые
+успел записать старый код во время выкладки. Каждая порция переносится
+в своей транзакции, так что команду можно прервать и запустить снова.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import membership
+from .models import Comment, CommentLike, Likes, Post, PostLike
+
+
+def move_batch(batch_size=None):
+    """Переносит одну порцию старых лайков, возвращает их число."""
+    batch_size = batch_size or settings.LIKES_SPLIT_BATCH_SIZE
+    with transaction.atomic():
+        likes = list(Likes.objects
+                     .order_by('pk')
+                     .values_list('pk', 'user_id', 'post_id', 'comment_id')
+                     [:batch_size])
+        if not likes:
+            return 0
+        # лайк мог быть поставлен заново уже в новую таблицу
+        PostLike.objects.bulk_create(
+            (PostLike(post_id=post_id, user_id=user_id)
+             for _, user_id, post_id, _ in likes if post_id),
+            ignore_conflicts=True
+        )
+        CommentLike.objects.bulk_create(
+            (CommentLike(comment_id=comment_id, user_id=user_id)
+             for _, user_id, _, comment_id in likes if comment_id),
+            ignore_conflicts=True
+        )
+        Likes.objects.filter(pk__in=[like[0] for like in likes]).delete()
+        post_ids = {like[2] for like in likes if like[2]}
+        if post_ids:
+            # bulk_create сигналов не шлет - пересчитываем
+            counts = (PostLike.objects
+                      .filter(post=OuterRef('pk'))
+                      .values('post')
+                      .annotate(total=Count('*'))
+                      .values('total'))
+            Post.all_objects.filter(pk__in=post_ids).update(
+                likes_count=Coalesce(Subquery(counts), 0))
+        comment_ids = {like[3] for like in likes if like[3]}
+        if comment_ids:
+            # при конфликте счетчик учел лайк дважды - пересчитываем
+            counts = (CommentLike.objects
+                      .filter(comment=OuterRef('pk'))
+                      .values('comment')
+                      .annotate(total=Count('*'))
+                      .values('total'))
+            Comment.objects.filter(pk__in=comment_ids).update(
+                likes_count=Coalesce(Subquery(counts), 0))
+    for user_id in {like[1] for like in likes if like[2]}:
+        membership.changed('likes', user_id)
+    return len(likes)
+
+
+def move_legacy_likes(batch_size=None):
+    total = 0
+    while True:
+        moved = move_batch(batch_size)
+        if not moved:
+            return total
+        total += moved
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_cutoff, archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями и лайками в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS,
+                            help='Архивировать посты старше стольких дней')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.ARCHIVE_BATCH_SIZE,
+                            help='Постов в одной транзакции')
+
+    def handle(self, *args, **options):
+        archived = archive_posts(archive_cutoff(options['days']),
+                                 options['batch_size'])
+        self.stdout.write(f'Перенесено в архив постов: {archived}')
@@ -0,0 +1,103 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import CommentLike, Likes, PostLike
+
+
+def create_sql(*models):
+    """DDL моделей в том виде, в каком его выполнит миграция."""
+    with connection.schema_editor(collect_sql=True, atomic=False) as editor:
+        for model in models:
+            editor.create_model(model)
+    return editor.collected_sql
+
+
+def table_sizes(db):
+    rows = db.execute(
+        'SELECT m.tbl_name, SUM(s.pgsize) FROM dbstat s '
+        'JOIN sqlite_master m ON m.name = s.name GROUP BY m.tbl_name')
+    return dict(rows)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер и скорость поиска лайков в общей таблице '
+            'Likes и в раздельных PostLike/CommentLike')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000,
+                            help='Лайков постов (столько же комментариев)')
+        parser.add_argument('--lookups', type=int, default=20000,
+                            help='Проверок «лайкнул ли» на каждую схему')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows, lookups = options['rows'], options['lookups']
+        rnd = random.Random(options['seed'])
+        users = max(rows // 50, 1)
+        pairs = set()
+        while len(pairs) < rows:
+            pairs.add((rnd.randrange(users), rnd.randrange(rows)))
+        pairs = sorted(pairs)
+        probes = [(rnd.randrange(users), rnd.randrange(rows))
+                  for _ in range(lookups)]
+        created = datetime(2026, 1, 1).isoformat(' ')
+        schemas = {
+            'before': (
+                create_sql(Likes),
+                [(Likes._meta.db_table,
+                  'INSERT INTO {} (user_id, post_id, comment_id, created) '
+                  'VALUES (?, ?, NULL, ?)',
+                  [(user, post, created) for user, post in pairs]),
+                 (Likes._meta.db_table,
+                  'INSERT INTO {} (user_id, post_id, comment_id, created) '
+                  'VALUES (?, NULL, ?, ?)',
+                  [(user, comment, created) for user, comment in pairs])],
+                f'SELECT 1 FROM {Likes._meta.db_table} '
+                'WHERE user_id = ? AND post_id = ? LIMIT 1',
+            ),
+            'after': (
+                create_sql(PostLike, CommentLike),
+                [(PostLike._meta.db_table,
+                  'INSERT INTO {} (post_id, user_id) VALUES (?, ?)',
+                  [(post, user) for user, post in pairs]),
+                 (CommentLike._meta.db_table,
+                  'INSERT INTO {} (comment_id, user_id) VALUES (?, ?)',
+                  [(comment, user) for user, comment in pairs])],
+                f'SELECT 1 FROM {PostLike._meta.db_table} '
+                'WHERE post_id = ? AND user_id = ? LIMIT 1',
+            ),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            for name, (ddl, inserts, lookup) in schemas.items():
+                path = os.path.join(directory, f'{name}.sqlite3')
+                db = sqlite3.connect(path)
+                for statement in ddl:
+                    db.execute(statement)
+                for table, sql, values in inserts:
+                    db.executemany(sql.format(table), values)
+                db.commit()
+                db.execute('VACUUM')
+                db.execute('ANALYZE')
+                sizes = table_sizes(db)
+                if name == 'after':
+                    probes = [(post, user) for user, post in probes]
+                start = time.perf_counter()
+                for probe in probes:
+                    db.execute(lookup, probe).fetchone()
+                elapsed = time.perf_counter() - start
+                db.close()
+                tables = ', '.join(
+                    f'{table} {size / 1024 / 1024:.1f} МБ'
+                    for table, size in sorted(sizes.items())
+                    if table.startswith('posts_'))
+                self.stdout.write(
+                    f'{name}: {tables}; '
+                    f'всего {sum(sizes.values()) / 1024 / 1024:.1f} МБ; '
+                    f'поиск {elapsed / lookups * 1e6:.1f} мкс')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Group
+from posts.stats import refresh_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику сообществ'
+
+    def handle(self, *args, **options):
+        group_ids = Group.objects.values_list('id', flat=True)
+        for group_id in group_ids.iterator():
+            refresh_group_stats(group_id)
+        self.stdout.write(f'Обновлено сообществ: {group_ids.count()}')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по графу подписок и лайков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int,
+                            default=settings.RECOMMENDATIONS_PROCESSES,
+                            help='Количество процессов для расчета')
+        parser.add_argument('--chunk', type=int,
+                            default=settings.RECOMMENDATIONS_CHUNK,
+                            help='Пользователей в одной порции')
+
+    def handle(self, *args, **options):
+        users = refresh_recommendations(options['processes'],
+                                        options['chunk'])
+        self.stdout.write(f'Обработано пользователей: {users}')
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.likes import move_legacy_likes
+
+
+class Command(BaseCommand):
+    help = 'Переносит лайки из таблицы Likes в PostLike и CommentLike'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.LIKES_SPLIT_BATCH_SIZE,
+                            help='Лайков в одной транзакции')
+
+    def handle(self, *args, **options):
+        moved = move_legacy_likes(options['batch_size'])
+        self.stdout.write(f'Перенесено лайков: {moved}')
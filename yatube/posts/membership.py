@@ -0,0 +1,74 @@
+"""
+Фильтры Блума лайков и подписок пользователя в общем кэше.
+
+Большинство проверок «лайкнул ли / подписан ли» дают «нет», и фильтр
+отвечает на них без запроса к базе. Работает только при BLOOM_FILTERS,
+то есть с кэшем, общим для всех процессов. Ложных «нет» быть не должно, поэтому
+фильтр лежит под ключом с версией: запись после коммита меняет версию, а
+читатель строит фильтр под той версией, которую прочитал до запроса к
+базе. Фильтр, собранный до чужого коммита, остается под устаревшим ключом
+и больше никем не читается.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.bloom import BloomFilter
+
+from .models import Follow, PostLike
+
+SOURCES = {
+    'likes': lambda user_id: PostLike.objects.filter(
+        user_id=user_id).values_list('post_id', flat=True),
+    'follows': lambda user_id: Follow.objects.filter(
+        user_id=user_id).values_list('author_id', flat=True),
+}
+
+
+def version_key(kind, user_id):
+    return f'bloom_version:{kind}:{user_id}'
+
+
+def bloom_key(kind, user_id, version):
+    return f'bloom:{kind}:{user_id}:{version}'
+
+
+def get_version(kind, user_id):
+    key = version_key(kind, user_id)
+    cache.add(key, uuid4().hex[:12], settings.BLOOM_CACHE_SECONDS)
+    return cache.get(key)
+
+
+def get_filter(kind, user_id):
+    version = get_version(kind, user_id)
+    raw = cache.get(bloom_key(kind, user_id, version))
+    if raw is not None:
+        return BloomFilter.from_bytes(raw)
+    bloom = BloomFilter.build(SOURCES[kind](user_id).iterator(),
+                              settings.BLOOM_ERROR_RATE,
+                              settings.BLOOM_MIN_CAPACITY)
+    cache.add(bloom_key(kind, user_id, version), bloom.to_bytes(),
+              settings.BLOOM_CACHE_SECONDS)
+    return bloom
+
+
+def might_contain(kind, user_id, item):
+    """False - точно нет; True - возможно, нужно проверить по базе."""
+    if not settings.BLOOM_FILTERS:
+        return True
+    return int(item) in get_filter(kind, user_id)
+
+
+def changed(kind, user_id):
+    """
+    Вызывается после коммита: следующая проверка построит фильтр заново.
+
+    Фильтр не дополняется на месте: без CAS в кэше две одновременные записи
+    затирали бы друг друга. Перестройка - один запрос по индексу user_id на
+    запись, а кнопок лайка на странице ленты десять.
+    """
+    if not settings.BLOOM_FILTERS:
+        return
+    cache.set(version_key(kind, user_id), uuid4().hex[:12],
+              settings.BLOOM_CACHE_SECONDS)
@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-19 17:52
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    active_since = (timezone.now()
+                    - timedelta(days=settings.ACTIVE_AUTHORS_DAYS))
+    for group in Group.objects.all():
+        posts = Post.objects.filter(group=group)
+        totals = posts.aggregate(count=Count('id'), last=Max('pub_date'))
+        GroupStats.objects.create(
+            group=group,
+            posts_count=totals['count'],
+            last_post_date=totals['last'],
+            active_authors=(posts.filter(pub_date__gte=active_since)
+                            .values('author').distinct().count())
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_auto_20220420_2050'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Сообщество')),
+                ('posts_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Количество постов')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+                ('active_authors', models.PositiveIntegerField(default=0, verbose_name='Активных авторов за неделю')),
+            ],
+            options={
+                'verbose_name': 'Статистика сообщества',
+                'verbose_name_plural': 'Статистика сообществ',
+                'ordering': ('-posts_count', 'group_id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', '-pub_date'], name='post_group_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
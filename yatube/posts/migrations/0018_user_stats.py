@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 18:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_user_stats(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserStats = apps.get_model('posts', 'UserStats')
+    counts = {}
+    for row in Follow.objects.values('author').annotate(total=Count('id')):
+        counts.setdefault(row['author'], [0, 0])[0] = row['total']
+    for row in Follow.objects.values('user').annotate(total=Count('id')):
+        counts.setdefault(row['user'], [0, 0])[1] = row['total']
+    UserStats.objects.bulk_create(
+        UserStats(user_id=user_id, followers_count=followers,
+                  following_count=following)
+        for user_id, (followers, following) in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0017_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+            options={
+                'verbose_name': 'Статистика пользователя',
+                'verbose_name_plural': 'Статистика пользователей',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['author', 'id'], name='follow_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['user', 'id'], name='follow_user_id_idx'),
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_hidden',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Скрыт'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 18:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_likes_count(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    Likes = apps.get_model('posts', 'Likes')
+    rows = (Likes.objects.filter(comment__isnull=False)
+            .values('comment').annotate(total=Count('id')).order_by())
+    for row in rows:
+        Comment.objects.filter(pk=row['comment']).update(
+            likes_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Лайков'),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-19 18:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_comment_likes_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedlike',
+            name='created',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата'),
+        ),
+        migrations.AlterField(
+            model_name='likes',
+            name='comment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='legacy_likes', to='posts.Comment', verbose_name='Понравившийся комментарий'),
+        ),
+        migrations.AlterField(
+            model_name='likes',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='legacy_likes', to='posts.Post', verbose_name='Понравившийся пост'),
+        ),
+        migrations.CreateModel(
+            name='PostLike',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='posts.Post', verbose_name='Понравившийся пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_likes', to=settings.AUTH_USER_MODEL, verbose_name='Понравилось')),
+            ],
+            options={
+                'verbose_name': 'Лайк поста',
+                'verbose_name_plural': 'Лайки постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='CommentLike',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='posts.Comment', verbose_name='Понравившийся комментарий')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comment_likes', to=settings.AUTH_USER_MODEL, verbose_name='Понравилось')),
+            ],
+            options={
+                'verbose_name': 'Лайк комментария',
+                'verbose_name_plural': 'Лайки комментариев',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postlike',
+            constraint=models.UniqueConstraint(fields=('post', 'user'), name='post_like_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='commentlike',
+            constraint=models.UniqueConstraint(fields=('comment', 'user'), name='comment_like_key'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def move_likes(apps, schema_editor):
+    Likes = apps.get_model('posts', 'Likes')
+    PostLike = apps.get_model('posts', 'PostLike')
+    CommentLike = apps.get_model('posts', 'CommentLike')
+    Comment = apps.get_model('posts', 'Comment')
+    while True:
+        # каждая порция - своя транзакция, блокировка не держится долго
+        with transaction.atomic():
+            likes = list(Likes.objects.order_by('pk').values_list(
+                'pk', 'user_id', 'post_id', 'comment_id')[:BATCH_SIZE])
+            if not likes:
+                return
+            PostLike.objects.bulk_create(
+                (PostLike(post_id=post_id, user_id=user_id)
+                 for _, user_id, post_id, _ in likes if post_id),
+                ignore_conflicts=True
+            )
+            CommentLike.objects.bulk_create(
+                (CommentLike(comment_id=comment_id, user_id=user_id)
+                 for _, user_id, _, comment_id in likes if comment_id),
+                ignore_conflicts=True
+            )
+            Likes.objects.filter(pk__in=[like[0] for like in likes]).delete()
+            comment_ids = {like[3] for like in likes if like[3]}
+            counts = (CommentLike.objects
+                      .filter(comment=OuterRef('pk'))
+                      .values('comment')
+                      .annotate(total=Count('*'))
+                      .values('total'))
+            Comment.objects.filter(pk__in=comment_ids).update(
+                likes_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('posts', '0024_split_likes'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_likes, migrations.RunPython.noop),
+    ]
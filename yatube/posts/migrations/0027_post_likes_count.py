@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 18:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_likes(likes):
+    return Coalesce(Subquery(
+        likes.filter(post=OuterRef('pk'))
+        .values('post')
+        .annotate(total=Count('*'))
+        .values('total')
+    ), 0)
+
+
+def fill_likes_count(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostLike = apps.get_model('posts', 'PostLike')
+    ArchivedPost = apps.get_model('posts', 'ArchivedPost')
+    ArchivedLike = apps.get_model('posts', 'ArchivedLike')
+    Post.objects.filter(pk__in=PostLike.objects.values('post')).update(
+        likes_count=count_likes(PostLike.objects.all()))
+    archived_likes = ArchivedLike.objects.filter(post__isnull=False)
+    ArchivedPost.objects.filter(pk__in=archived_likes.values('post')).update(
+        likes_count=count_likes(archived_likes))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_post_author_pub_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Лайков'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Лайков'),
+        ),
+        migrations.RunPython(fill_likes_count, migrations.RunPython.noop),
+    ]
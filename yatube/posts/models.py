@@ -5,10 +5,17 @@ from django.conf import settings
 User = get_user_model()
 
 
+class VisiblePostManager(models.Manager):
+    """Посты без скрытых: удаленные ждут фоновой очистки."""
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
+
 class Post(models.Model):
     text = models.TextField(help_text='Текст нового поста',
                             verbose_name='Текст поста')
     pub_date = models.DateTimeField(auto_now_add=True,
+                                    db_index=True,
                                     help_text='Дата публикации',
                                     verbose_name='Дата публикации')
     author = models.ForeignKey(
@@ -33,15 +40,38 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    is_hidden = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='Скрыт'
+    )
+    likes_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Лайков')
+
+    objects = VisiblePostManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['group', '-pub_date'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date'],
+                         name='post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:settings.SYMBOLS_IN_STR]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # запоминаем группу из БД, чтобы сигналы видели смену группы
+        instance._loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200,
@@ -57,6 +87,38 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Сообщество'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        verbose_name='Количество постов'
+    )
+    last_post_date = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Дата последнего поста'
+    )
+    active_authors = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Активных авторов за неделю'
+    )
+
+    class Meta:
+        ordering = ('-posts_count', 'group_id')
+        verbose_name = 'Статистика сообщества'
+        verbose_name_plural = 'Статистика сообществ'
+
+    def __str__(self):
+        return str(self.group)
+
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -77,8 +139,11 @@ class Comment(models.Model):
     text = models.TextField(help_text='Текст комментария',
                             verbose_name='Комментарий')
     created = models.DateTimeField(auto_now_add=True,
+                                   db_index=True,
                                    help_text='Дата публикации комментария',
                                    verbose_name='Дата публикации комментария')
+    likes_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Лайков')
 
     class Meta:
         ordering = ('-created',)
@@ -106,6 +171,12 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        indexes = [
+            models.Index(fields=['author', 'id'],
+                         name='follow_author_id_idx'),
+            models.Index(fields=['user', 'id'],
+                         name='follow_user_id_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],
@@ -116,7 +187,72 @@ class Follow(models.Model):
         ]
 
 
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    archived_posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Постов в архиве'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика пользователя'
+        verbose_name_plural = 'Статистика пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class Recommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField(verbose_name='Вес')
+    rank = models.PositiveSmallIntegerField(verbose_name='Место')
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        ordering = ('user', 'rank')
+        indexes = [
+            models.Index(fields=['user', 'rank'],
+                         name='recommendation_user_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
 class Likes(models.Model):
+    """
+    Старая общая таблица лайков постов и комментариев.
+
+    Новые лайки пишутся в PostLike и CommentLike, а эти строки переносят
+    миграция 0025 и команда split_likes; после переноса таблица будет
+    удалена.
+    """
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -126,7 +262,7 @@ class Likes(models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
-        related_name='likes',
+        related_name='legacy_likes',
         verbose_name='Понравившийся пост',
         blank=True,
         null=True
@@ -134,7 +270,7 @@ class Likes(models.Model):
     comment = models.ForeignKey(
         Comment,
         on_delete=models.CASCADE,
-        related_name='likes',
+        related_name='legacy_likes',
         verbose_name='Понравившийся комментарий',
         blank=True,
         null=True
@@ -158,3 +294,163 @@ class Likes(models.Model):
                 name='twice_likes_comment'
             )
         ]
+
+
+class PostLike(models.Model):
+    # естественный ключ - (post, user); составных первичных ключей в Django
+    # нет, а id в SQLite - это rowid и отдельного индекса не занимает.
+    # Уникальный индекс начинается с post, поэтому свой индекс у FK не нужен
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='likes',
+        verbose_name='Понравившийся пост'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_likes',
+        verbose_name='Понравилось'
+    )
+
+    class Meta:
+        verbose_name = 'Лайк поста'
+        verbose_name_plural = 'Лайки постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('post', 'user'),
+                name='post_like_key'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.post_id}'
+
+
+class CommentLike(models.Model):
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='likes',
+        verbose_name='Понравившийся комментарий'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comment_likes',
+        verbose_name='Понравилось'
+    )
+
+    class Meta:
+        verbose_name = 'Лайк комментария'
+        verbose_name_plural = 'Лайки комментариев'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('comment', 'user'),
+                name='comment_like_key'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.comment_id}'
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесенный из горячей таблицы командой archive_posts."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст поста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа поста'
+    )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    likes_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Лайков')
+    archived = models.DateTimeField(auto_now_add=True,
+                                    verbose_name='Дата архивации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(fields=['author', '-pub_date'],
+                         name='archived_post_author_idx'),
+        ]
+
+    def __str__(self):
+        return self.text[:settings.SYMBOLS_IN_STR]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Комментарий')
+    created = models.DateTimeField(verbose_name='Дата публикации комментария')
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text[:settings.SYMBOLS_IN_STR]
+
+
+class ArchivedLike(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_likes',
+        verbose_name='Понравилось'
+    )
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        blank=True,
+        null=True,
+        verbose_name='Понравившийся пост'
+    )
+    comment = models.ForeignKey(
+        ArchivedComment,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        blank=True,
+        null=True,
+        verbose_name='Понравившийся комментарий'
+    )
+    # у лайков из PostLike и CommentLike даты нет
+    created = models.DateTimeField(blank=True, null=True, verbose_name='Дата')
+
+    class Meta:
+        verbose_name = 'Архивный лайк'
+        verbose_name_plural = 'Архивные лайки'
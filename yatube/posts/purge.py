@@ -0,0 +1,130 @@
+"""
+Мягкое удаление пользователей и постов.
+
+Админка только скрывает объект, а зависимые строки удаляет фоновая задача
+небольшими порциями: каждая порция - отдельная короткая транзакция, и
+блокировка записи SQLite не держится секундами.
+"""
+from django.conf import settings
+from django.db.models import Count
+from sorl.thumbnail import delete as delete_image
+
+from core.paginator import bump_count
+from core.taskqueue import enqueue
+
+from .feed import invalidate_timeline
+from .models import (ArchivedComment, ArchivedLike, ArchivedPost, Comment,
+                     CommentLike, Follow, Likes, Post, PostLike,
+                     Recommendation, User)
+from .stats import (ALL_POSTS_COUNT_KEY, author_posts_count_key,
+                    refresh_group_stats)
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """Удаляет строки выборки порциями, возвращает их количество."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    manager = queryset.model._base_manager
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += manager.filter(pk__in=ids).delete()[0]
+
+
+def hide_posts(queryset):
+    """Скрывает посты и сразу убирает их из счетчиков и статистики."""
+    queryset = queryset.filter(is_hidden=False)
+    totals = list(queryset.values('author_id', 'group_id')
+                  .annotate(total=Count('id')).order_by())
+    queryset.update(is_hidden=True)
+    for row in totals:
+        bump_count(ALL_POSTS_COUNT_KEY, -row['total'])
+        bump_count(author_posts_count_key(row['author_id']), -row['total'])
+        invalidate_timeline(row['author_id'])
+    for group_id in {row['group_id'] for row in totals}:
+        if group_id is not None:
+            refresh_group_stats(group_id)
+
+
+def soft_delete_post(post):
+    hide_posts(Post.all_objects.filter(pk=post.pk))
+    enqueue('posts.purge_post', post.pk,
+            idempotency_key=f'purge_post:{post.pk}')
+
+
+def soft_delete_user(user):
+    user.is_active = False
+    user.save(update_fields=('is_active',))
+    hide_posts(Post.all_objects.filter(author=user))
+    enqueue('posts.purge_user', user.pk,
+            idempotency_key=f'purge_user:{user.pk}')
+
+
+def remove_orphan_images(names):
+    """Удаляет файлы картинок (и их миниатюры), на которые никто не ссылается."""
+    for name in names:
+        if (not Post.all_objects.filter(image=name).exists()
+                and not ArchivedPost.objects.filter(image=name).exists()):
+            delete_image(name)
+
+
+def purge_posts(queryset):
+    batch_size = settings.PURGE_BATCH_SIZE
+    images = set()
+    while True:
+        batch = list(queryset.values_list('pk', 'image')[:batch_size])
+        if not batch:
+            break
+        ids = [pk for pk, _ in batch]
+        images.update(image for _, image in batch if image)
+        delete_in_batches(
+            CommentLike.objects.filter(comment__post_id__in=ids))
+        delete_in_batches(PostLike.objects.filter(post_id__in=ids))
+        delete_in_batches(Comment.objects.filter(post_id__in=ids))
+        Post.all_objects.filter(pk__in=ids).delete()
+    remove_orphan_images(images)
+
+
+def purge_post(post_id):
+    purge_posts(Post.all_objects.filter(pk=post_id, is_hidden=True))
+
+
+def purge_archived(user_id):
+    images = set(ArchivedPost.objects
+                 .filter(author_id=user_id)
+                 .exclude(image='')
+                 .values_list('image', flat=True))
+    delete_in_batches(ArchivedLike.objects.filter(user_id=user_id))
+    delete_in_batches(ArchivedLike.objects.filter(post__author_id=user_id))
+    delete_in_batches(
+        ArchivedLike.objects.filter(comment__author_id=user_id))
+    delete_in_batches(
+        ArchivedLike.objects.filter(comment__post__author_id=user_id))
+    delete_in_batches(
+        ArchivedComment.objects.filter(post__author_id=user_id))
+    delete_in_batches(ArchivedComment.objects.filter(author_id=user_id))
+    delete_in_batches(ArchivedPost.objects.filter(author_id=user_id))
+    remove_orphan_images(images)
+
+
+def purge_user(user_id):
+    # пользователя могли восстановить, пока задача ждала очереди
+    if not User.objects.filter(pk=user_id, is_active=False).exists():
+        return
+    posts = Post.all_objects.filter(author_id=user_id)
+    hide_posts(posts)
+    delete_in_batches(PostLike.objects.filter(user_id=user_id))
+    delete_in_batches(CommentLike.objects.filter(user_id=user_id))
+    delete_in_batches(CommentLike.objects.filter(comment__author_id=user_id))
+    delete_in_batches(Likes.objects.filter(user_id=user_id))
+    delete_in_batches(Likes.objects.filter(comment__author_id=user_id))
+    delete_in_batches(Comment.objects.filter(author_id=user_id))
+    delete_in_batches(Follow.objects.filter(user_id=user_id))
+    delete_in_batches(Follow.objects.filter(author_id=user_id))
+    delete_in_batches(Recommendation.objects.filter(user_id=user_id))
+    delete_in_batches(Recommendation.objects.filter(author_id=user_id))
+    purge_posts(posts)
+    purge_archived(user_id)
+    # зависимых строк не осталось, каскад удалит лишь мелочи
+    User.objects.filter(pk=user_id).delete()
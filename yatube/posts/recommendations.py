@@ -0,0 +1,143 @@
+"""Рекомендации «на кого подписаться».
+
+Граф подписок и лайков целиком загружается в компактные массивы
+в формате CSR (строка пользователя -> отсортированные соседи), после чего
+кандидаты считаются в памяти порциями пользователей без запросов к базе:
+друзья друзей плюс авторы, которых лайкают люди с похожими лайками.
+"""
+import heapq
+import multiprocessing
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Follow, PostLike, Recommendation
+
+# граф модульный, чтобы форкнутые процессы получили его без сериализации
+_graph = None
+
+
+class CSR:
+    """Разреженная матрица смежности: соседи строки i лежат в
+    indices[indptr[i]:indptr[i + 1]]."""
+
+    def __init__(self, pairs, size):
+        rows = defaultdict(set)
+        for row, col in pairs:
+            rows[row].add(col)
+        self.indptr = array('l', [0])
+        self.indices = array('l')
+        for row in range(size):
+            self.indices.extend(sorted(rows.get(row, ())))
+            self.indptr.append(len(self.indices))
+
+    def row(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def transpose(self, size):
+        return CSR(
+            ((col, row) for row in range(len(self.indptr) - 1)
+             for col in self.row(row)),
+            size
+        )
+
+
+class Graph:
+    def __init__(self, user_ids, follows, likes):
+        self.user_ids = array('l', user_ids)
+        size = len(self.user_ids)
+        self.follows = CSR(follows, size)
+        self.likes = CSR(likes, size)
+        self.likers = self.likes.transpose(size)
+
+
+def load_graph():
+    """Читает ребра подписок и лайков (пользователь -> автор поста)."""
+    follows = list(Follow.objects.values_list('user_id', 'author_id'))
+    likes = list(PostLike.objects.values_list('user_id', 'post__author_id'))
+    user_ids = sorted({uid for edge in follows + likes for uid in edge})
+    index = {uid: i for i, uid in enumerate(user_ids)}
+    return Graph(
+        user_ids,
+        ((index[user], index[author]) for user, author in follows),
+        ((index[user], index[author]) for user, author in likes
+         if user != author),
+    )
+
+
+def recommend(graph, user, top, like_weight):
+    """Top-K кандидатов одного пользователя: [(вес, индекс автора)]."""
+    scores = defaultdict(float)
+    followed = graph.follows.row(user)
+    for friend in followed:
+        for candidate in graph.follows.row(friend):
+            scores[candidate] += 1
+    if like_weight:
+        for author in graph.likes.row(user):
+            for similar in graph.likers.row(author):
+                if similar == user:
+                    continue
+                for candidate in graph.likes.row(similar):
+                    scores[candidate] += like_weight
+    scores.pop(user, None)
+    for author in followed:
+        scores.pop(author, None)
+    return heapq.nlargest(top, ((score, candidate)
+                                for candidate, score in scores.items()))
+
+
+def compute_chunk(bounds):
+    start, stop = bounds
+    top = settings.RECOMMENDATIONS_TOP
+    like_weight = settings.RECOMMENDATIONS_LIKE_WEIGHT
+    user_ids = _graph.user_ids
+    return [
+        (user_ids[user], [(user_ids[candidate], score) for score, candidate
+                          in recommend(_graph, user, top, like_weight)])
+        for user in range(start, stop)
+    ]
+
+
+def save_chunk(results):
+    # id в графе отсортированы, поэтому порция - сплошной диапазон id
+    with transaction.atomic():
+        Recommendation.objects.filter(
+            user_id__gte=results[0][0],
+            user_id__lte=results[-1][0]).delete()
+        Recommendation.objects.bulk_create(
+            Recommendation(user_id=user_id, author_id=author_id,
+                           score=score, rank=rank)
+            for user_id, candidates in results
+            for rank, (author_id, score) in enumerate(candidates, 1)
+        )
+
+
+def refresh_recommendations(processes=None, chunk=None):
+    """Пересчитывает таблицу рекомендаций; возвращает число пользователей."""
+    global _graph
+    processes = processes or settings.RECOMMENDATIONS_PROCESSES
+    chunk = chunk or settings.RECOMMENDATIONS_CHUNK
+    _graph = load_graph()
+    size = len(_graph.user_ids)
+    chunks = [(start, min(start + chunk, size))
+              for start in range(0, size, chunk)]
+    try:
+        if processes > 1 and len(chunks) > 1:
+            # соединение, унаследованное воркерами, использовать нельзя
+            connections.close_all()
+            with multiprocessing.Pool(processes) as pool:
+                for results in pool.imap_unordered(compute_chunk, chunks):
+                    save_chunk(results)
+        else:
+            for bounds in chunks:
+                save_chunk(compute_chunk(bounds))
+        # пользователи, выпавшие из графа, рекомендаций не получают
+        (Recommendation.objects
+         .exclude(user_id__in=Follow.objects.values('user_id'))
+         .exclude(user_id__in=PostLike.objects.values('user_id'))
+         .delete())
+    finally:
+        _graph = None
+    return size
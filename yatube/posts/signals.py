@@ -0,0 +1,173 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.template.loader import render_to_string
+
+from core import events
+from core.paginator import bump_count
+from core.taskqueue import enqueue
+
+from .models import (ArchivedPost, Post, Group, GroupStats, Comment,
+                     CommentLike, Follow, PostLike, User)
+from . import cards, feed, membership, stats
+from .tasks import make_thumbnail
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats_on_save(sender, instance, created, raw=False,
+                               **kwargs):
+    if raw:
+        return
+    old_group_id = None if created else getattr(
+        instance, '_loaded_group_id', instance.group_id)
+    new_group_id = instance.group_id
+    if old_group_id != new_group_id:
+        if old_group_id is not None:
+            stats.post_removed(old_group_id, instance.pub_date)
+        if new_group_id is not None:
+            stats.post_added(new_group_id, instance.pub_date)
+    instance._loaded_group_id = new_group_id
+
+
+@receiver(post_delete, sender=Post)
+def update_group_stats_on_delete(sender, instance, **kwargs):
+    # скрытый пост уже убран из статистики при скрытии
+    if instance.is_hidden:
+        return
+    group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    if group_id is not None:
+        stats.post_removed(group_id, instance.pub_date)
+
+
+@receiver(post_save, sender=Post)
+def increase_posts_counts(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_count(stats.ALL_POSTS_COUNT_KEY, 1)
+        bump_count(stats.author_posts_count_key(instance.author_id), 1)
+
+
+@receiver(post_delete, sender=Post)
+def decrease_posts_counts(sender, instance, **kwargs):
+    if instance.is_hidden:
+        return
+    bump_count(stats.ALL_POSTS_COUNT_KEY, -1)
+    bump_count(stats.author_posts_count_key(instance.author_id), -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    cards.invalidate('post', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_author_timeline(sender, instance, **kwargs):
+    feed.invalidate_timeline(instance.author_id)
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def invalidate_liked_post_card(sender, instance, **kwargs):
+    cards.invalidate('post', instance.post_id)
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+def invalidate_like_filter(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: membership.changed('likes', user_id))
+
+
+@receiver(post_save, sender=PostLike)
+def increase_post_likes(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.post_likes_changed(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=PostLike)
+def decrease_post_likes(sender, instance, **kwargs):
+    stats.post_likes_changed(instance.post_id, -1)
+
+
+@receiver(post_save, sender=CommentLike)
+def increase_comment_likes(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.comment_likes_changed(instance.comment_id, 1)
+
+
+@receiver(post_delete, sender=CommentLike)
+def decrease_comment_likes(sender, instance, **kwargs):
+    stats.comment_likes_changed(instance.comment_id, -1)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def decrease_archived_posts_count(sender, instance, **kwargs):
+    stats.archived_posts_changed(instance.author_id, -1)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, created, update_fields=None,
+                            **kwargs):
+    # вход пользователя обновляет только last_login - карточки не меняются
+    if created or update_fields == frozenset(('last_login',)):
+        return
+    cards.invalidate('user', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_cards(sender, instance, created, **kwargs):
+    if not created:
+        cards.invalidate('group', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnail(sender, instance, raw=False, **kwargs):
+    if instance.image and not raw:
+        enqueue(make_thumbnail, instance.pk,
+                idempotency_key=f'thumbnail:{instance.pk}:{instance.image}')
+
+
+@receiver(post_save, sender=Follow)
+def increase_follow_counts(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.follow_changed(instance.user_id, instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrease_follow_counts(sender, instance, **kwargs):
+    stats.follow_changed(instance.user_id, instance.author_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_filter(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: membership.changed('follows', user_id))
+
+
+@receiver(post_save, sender=Post)
+def announce_new_post(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    channels = ['posts', f'author:{instance.author_id}']
+    if instance.group_id is not None:
+        channels.append(f'group:{instance.group_id}')
+    transaction.on_commit(
+        lambda: events.publish(channels, post=instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def stream_new_comment(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    html = render_to_string('posts/includes/comment.html',
+                            {'comment': instance})
+    transaction.on_commit(lambda: events.publish(
+        [f'comments:{instance.post_id}'], comment=instance.pk, html=html))
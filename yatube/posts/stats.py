@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (ArchivedPost, Comment, Follow, Post, GroupStats,
+                     UserStats)
+
+ALL_POSTS_COUNT_KEY = 'posts_count:all'
+
+
+def author_posts_count_key(author_id):
+    return f'posts_count:author:{author_id}'
+
+
+def active_since():
+    return timezone.now() - timedelta(days=settings.ACTIVE_AUTHORS_DAYS)
+
+
+def count_active_authors(group_id):
+    return (Post.objects
+            .filter(group_id=group_id, pub_date__gte=active_since())
+            .values('author_id')
+            .distinct()
+            .count())
+
+
+def last_post_date(group_id):
+    return (Post.objects
+            .filter(group_id=group_id)
+            .order_by('-pub_date')
+            .values_list('pub_date', flat=True)
+            .first())
+
+
+def refresh_group_stats(group_id):
+    """Полностью пересчитывает статистику одного сообщества."""
+    GroupStats.objects.update_or_create(
+        group_id=group_id,
+        defaults={
+            'posts_count': Post.objects.filter(group_id=group_id).count(),
+            'last_post_date': last_post_date(group_id),
+            'active_authors': count_active_authors(group_id),
+        }
+    )
+
+
+def post_added(group_id, pub_date):
+    # active_authors не трогаем: DISTINCT по авторам на каждый пост дорог,
+    # его пересчитывает периодическая задача refresh_all_group_stats
+    updated = GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F('posts_count') + 1)
+    if not updated:
+        refresh_group_stats(group_id)
+        return
+    (GroupStats.objects
+     .filter(group_id=group_id)
+     .exclude(last_post_date__gte=pub_date)
+     .update(last_post_date=pub_date))
+
+
+def post_removed(group_id, pub_date):
+    stats = GroupStats.objects.filter(group_id=group_id).first()
+    if stats is None or stats.posts_count == 0:
+        refresh_group_stats(group_id)
+        return
+    fields = {'posts_count': F('posts_count') - 1}
+    if stats.last_post_date is None or pub_date >= stats.last_post_date:
+        fields['last_post_date'] = last_post_date(group_id)
+    GroupStats.objects.filter(group_id=group_id).update(**fields)
+
+
+def get_user_stats(user_id):
+    """Счетчики подписок пользователя; при отсутствии считаются заново."""
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        stats, _ = UserStats.objects.update_or_create(
+            user_id=user_id,
+            defaults={
+                'followers_count':
+                    Follow.objects.filter(author_id=user_id).count(),
+                'following_count':
+                    Follow.objects.filter(user_id=user_id).count(),
+                'archived_posts_count':
+                    ArchivedPost.objects.filter(author_id=user_id).count(),
+            }
+        )
+    return stats
+
+
+def follow_changed(user_id, author_id, delta):
+    """Сдвигает счетчики; отсутствующие строки досчитает get_user_stats."""
+    followers = UserStats.objects.filter(user_id=author_id)
+    following = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        followers = followers.filter(followers_count__gt=0)
+        following = following.filter(following_count__gt=0)
+    followers.update(followers_count=F('followers_count') + delta)
+    following.update(following_count=F('following_count') + delta)
+
+
+def archived_posts_changed(author_id, delta):
+    stats = UserStats.objects.filter(user_id=author_id)
+    if delta < 0:
+        stats = stats.filter(archived_posts_count__gt=0)
+    stats.update(archived_posts_count=F('archived_posts_count') + delta)
+
+
+def post_likes_changed(post_id, delta):
+    # all_objects: у скрытого поста счетчик тоже должен сходиться
+    posts = Post.all_objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(likes_count__gt=0)
+    posts.update(likes_count=F('likes_count') + delta)
+
+
+def comment_likes_changed(comment_id, delta):
+    comments = Comment.objects.filter(pk=comment_id)
+    if delta < 0:
+        comments = comments.filter(likes_count__gt=0)
+    comments.update(likes_count=F('likes_count') + delta)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from core.models import Counter
+from core.taskqueue import task
+
+from .models import Group, Post
+from .archive import archive_posts
+from .purge import purge_post, purge_user
+from .recommendations import refresh_recommendations
+from .stats import ALL_POSTS_COUNT_KEY, refresh_group_stats
+
+# те же параметры, что у {% thumbnail %} в шаблонах постов
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task(name='posts.make_thumbnail')
+def make_thumbnail(post_id):
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is not None and post.image:
+        get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task(name='posts.refresh_all_group_stats', every=settings.GROUP_STATS_INTERVAL,
+      lease=settings.TASK_LONG_LEASE_SECONDS)
+def refresh_all_group_stats():
+    for group_id in Group.objects.values_list('id', flat=True).iterator():
+        refresh_group_stats(group_id)
+
+
+@task(name='posts.reconcile_posts_count',
+      every=settings.PAGINATOR_COUNT_SECONDS)
+def reconcile_posts_count():
+    # в БД, а не в кэш: кэш воркера процессам сайта не виден. Сайт берет
+    # это число, когда его закэшированное количество истекает
+    Counter.objects.update_or_create(
+        name=ALL_POSTS_COUNT_KEY, defaults={'value': Post.objects.count()})
+
+
+@task(name='posts.refresh_recommendations',
+      every=settings.RECOMMENDATIONS_INTERVAL,
+      lease=settings.TASK_LONG_LEASE_SECONDS)
+def refresh_all_recommendations():
+    refresh_recommendations()
+
+
+@task(name='posts.purge_post')
+def purge_post_task(post_id):
+    purge_post(post_id)
+
+
+@task(name='posts.purge_user', lease=settings.TASK_LONG_LEASE_SECONDS)
+def purge_user_task(user_id):
+    purge_user(user_id)
+
+
+@task(name='posts.archive_posts', every=settings.ARCHIVE_INTERVAL,
+      lease=settings.TASK_LONG_LEASE_SECONDS)
+def archive_old_posts():
+    archive_posts()
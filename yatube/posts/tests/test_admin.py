@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, PostLike
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        group = Group.objects.create(title='Группа', slug='group')
+        posts = [
+            Post.objects.create(author=cls.admin, group=group,
+                                text=f'Пост {number}')
+            for number in range(5)
+        ]
+        for post in posts:
+            Comment.objects.create(post=post, author=cls.admin, text='Текст')
+        PostLike.objects.create(user=cls.admin, post=posts[0])
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_changelists_do_not_count(self):
+        """Повторное открытие списков не выполняет COUNT(*)"""
+        for model in ('post', 'comment', 'postlike', 'commentlike'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                self.assertEqual(self.client.get(url).status_code, 200)
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                counts = [query['sql'] for query in queries
+                          if 'COUNT(' in query['sql']]
+                self.assertEqual(counts, [])
+
+    def test_post_changelist_queries_do_not_grow(self):
+        """Автор и группа постов подгружаются одним запросом"""
+        url = reverse('admin:posts_post_changelist')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        Post.objects.create(author=User.objects.create(username='other'),
+                            text='Еще пост')
+        cache.clear()
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(after), len(before))
+
+    def test_hidden_posts_are_listed(self):
+        """Скрытые посты, ждущие очистки, видны в админке"""
+        hidden = Post.objects.create(author=self.admin, text='Скрытый пост')
+        Post.all_objects.filter(pk=hidden.pk).update(is_hidden=True)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertContains(response, 'Скрытый пост')
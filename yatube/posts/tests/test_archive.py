@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..archive import archive_cutoff, archive_posts
+from ..models import (ArchivedComment, ArchivedLike, ArchivedPost, Comment,
+                      CommentLike, Post, PostLike)
+from ..stats import get_user_stats
+
+User = get_user_model()
+
+
+@override_settings(POSTS_ON_PAGE=2)
+class ArchiveTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = User.objects.create(username='old_author')
+        self.reader = User.objects.create(username='reader')
+        self.old_posts = [
+            Post.objects.create(author=self.author, text=f'Старый {number}')
+            for number in range(3)
+        ]
+        for number, post in enumerate(self.old_posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=400 + number))
+        comment = Comment.objects.create(
+            post=self.old_posts[0], author=self.reader, text='Комментарий')
+        PostLike.objects.create(user=self.reader, post=self.old_posts[0])
+        CommentLike.objects.create(user=self.author, comment=comment)
+        self.new_post = Post.objects.create(author=self.author, text='Новый')
+
+    def test_old_posts_are_moved(self):
+        """Старые посты с комментариями и лайками уходят в архив"""
+        get_user_stats(self.author.pk)
+        self.assertEqual(archive_posts(archive_cutoff(), batch_size=2), 3)
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertEqual(ArchivedComment.objects.count(), 1)
+        self.assertEqual(ArchivedLike.objects.count(), 2)
+        self.assertEqual(
+            ArchivedPost.objects.get(pk=self.old_posts[0].pk).likes_count, 1)
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(PostLike.objects.exists())
+        self.assertFalse(CommentLike.objects.exists())
+        self.assertEqual(
+            get_user_stats(self.author.pk).archived_posts_count, 3)
+
+    def test_views_read_archive(self):
+        """Профиль и страница поста читают архив, главная - нет"""
+        archive_posts()
+        url = reverse('posts:profile',
+                      kwargs={'username': self.author.username})
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.new_post,
+                          ArchivedPost.objects.get(pk=self.old_posts[0].pk)])
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual([post.pk for post in response.context['page_obj']],
+                         [self.old_posts[1].pk, self.old_posts[2].pk])
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_posts[0].pk}))
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['posts_count'], 4)
+        self.assertContains(response, 'Комментарий')
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertEqual(list(response.context['page_obj']), [self.new_post])
+
+    def test_archive_of_deleted_user_is_hidden(self):
+        """Архивные посты удаленного пользователя не показываются"""
+        archive_posts()
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_posts[0].pk}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertEqual(list(response.context['page_obj']), [self.new_post])
+
+    def test_deleted_archived_post_updates_count(self):
+        """Удаление архивного поста уменьшает счетчик архива"""
+        get_user_stats(self.author.pk)
+        archive_posts()
+        ArchivedPost.objects.filter(pk=self.old_posts[0].pk).delete()
+        self.assertEqual(
+            get_user_stats(self.author.pk).archived_posts_count, 2)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import membership
+from ..likes import move_legacy_likes
+from ..models import Comment, CommentLike, Likes, Post, PostLike
+
+User = get_user_model()
+
+
+class SplitLikesTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        self.posts = [
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+            for number in range(3)
+        ]
+        self.comment = Comment.objects.create(
+            post=self.posts[0], author=self.author, text='Комментарий')
+        for post in self.posts:
+            Likes.objects.create(user=self.reader, post=post)
+        Likes.objects.create(user=self.reader, comment=self.comment)
+        Comment.objects.filter(pk=self.comment.pk).update(likes_count=1)
+
+    @override_settings(BLOOM_FILTERS=True)
+    def test_legacy_likes_are_moved(self):
+        """Старые лайки переносятся порциями в раздельные таблицы"""
+        membership.get_filter('likes', self.reader.pk)
+        self.assertEqual(move_legacy_likes(batch_size=3), 4)
+        self.assertFalse(Likes.objects.exists())
+        self.assertEqual(
+            set(PostLike.objects.values_list('post_id', flat=True)),
+            {post.pk for post in self.posts})
+        self.assertTrue(CommentLike.objects.filter(
+            comment=self.comment, user=self.reader).exists())
+        self.assertEqual(
+            list(Post.objects.values_list('likes_count', flat=True)),
+            [1, 1, 1])
+        self.assertTrue(membership.might_contain(
+            'likes', self.reader.pk, self.posts[2].pk))
+
+    def test_relike_before_move(self):
+        """Лайк, поставленный заново до переноса, не задваивается"""
+        CommentLike.objects.create(comment=self.comment, user=self.reader)
+        move_legacy_likes()
+        self.assertEqual(CommentLike.objects.count(), 1)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes_count, 1)
+
+    def test_unlike_removes_legacy_like(self):
+        """Снятый до переноса лайк не возвращается после split_likes"""
+        self.client.force_login(self.reader)
+        self.client.get(
+            reverse('posts:dislike_post', args=(self.posts[1].pk,)))
+        self.client.get(
+            reverse('posts:unlike_comment', args=(self.comment.pk,)))
+        move_legacy_likes()
+        self.assertFalse(
+            PostLike.objects.filter(post=self.posts[1]).exists())
+        self.assertFalse(CommentLike.objects.exists())
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.likes_count, 0)
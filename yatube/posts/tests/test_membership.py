@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import holes, membership
+from ..models import Follow, Post, PostLike
+
+User = get_user_model()
+
+
+@override_settings(BLOOM_FILTERS=True)
+@mock.patch('posts.signals.transaction.on_commit', lambda cb: cb())
+class MembershipTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create(username='reader')
+        self.author = User.objects.create(username='writer')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def test_negative_answer_skips_database(self):
+        """Непонравившийся пост и чужой автор проверяются без запросов"""
+        membership.get_filter('likes', self.user.pk)
+        membership.get_filter('follows', self.user.pk)
+        with self.assertNumQueries(0):
+            holes.like_button(self.request, self.post.pk)
+            holes.follow_button(
+                self.request, str(self.author.pk), self.author.username)
+
+    def test_writes_invalidate_filter(self):
+        """Новые лайк и подписка видны в фильтре сразу после записи"""
+        membership.get_filter('likes', self.user.pk)
+        membership.get_filter('follows', self.user.pk)
+        PostLike.objects.create(user=self.user, post=self.post)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(membership.might_contain(
+            'likes', self.user.pk, self.post.pk))
+        self.assertTrue(membership.might_contain(
+            'follows', self.user.pk, self.author.pk))
+        html = holes.like_button(self.request, self.post.pk)
+        self.assertIn('dislike', html)
+
+    def test_stale_filter_is_not_read(self):
+        """Фильтр, собранный до коммита лайка, после него не используется"""
+        version = membership.get_version('likes', self.user.pk)
+        stale = membership.BloomFilter.build([])
+        PostLike.objects.create(user=self.user, post=self.post)
+        cache.add(membership.bloom_key('likes', self.user.pk, version),
+                  stale.to_bytes())
+        self.assertTrue(membership.might_contain(
+            'likes', self.user.pk, self.post.pk))
+
+    def test_like_twice(self):
+        """Повторный лайк не падает с ошибкой"""
+        self.client.force_login(self.user)
+        url = reverse('posts:like_post', args=(self.post.pk,))
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', args=(self.post.pk,)))
+        self.assertEqual(PostLike.objects.count(), 1)
@@ -2,7 +2,8 @@ from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.conf import settings
 
-from ..models import Group, Post, Comment, Follow
+from ..models import Group, GroupStats, Post, Comment, Follow
+from ..tasks import refresh_all_group_stats
 
 User = get_user_model()
 
@@ -131,3 +132,70 @@ class FollowModelTest(TestCase):
                 self.assertEqual(
                     follow._meta.get_field(field).verbose_name,
                     expected_value)
+
+
+class GroupStatsModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='stats_author')
+        cls.user_2 = User.objects.create_user(username='stats_author_2')
+        cls.group = Group.objects.create(
+            title='Группа со статистикой',
+            slug='stats-group',
+            description='Описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Вторая группа',
+            slug='stats-group-2',
+            description='Описание',
+        )
+
+    def get_stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_created_with_group(self):
+        """Статистика создается вместе с сообществом"""
+        stats = self.get_stats(self.group)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post_date)
+        self.assertEqual(stats.active_authors, 0)
+
+    def test_stats_follow_post_create_and_delete(self):
+        """Статистика обновляется при создании и удалении поста"""
+        first = Post.objects.create(
+            author=self.user, group=self.group, text='Первый')
+        last = Post.objects.create(
+            author=self.user_2, group=self.group, text='Второй')
+        stats = self.get_stats(self.group)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.last_post_date, last.pub_date)
+        last.delete()
+        stats = self.get_stats(self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post_date, first.pub_date)
+
+    def test_active_authors_are_refreshed_periodically(self):
+        """Активных авторов пересчитывает периодическая задача"""
+        Post.objects.create(author=self.user, group=self.group, text='1')
+        Post.objects.create(author=self.user_2, group=self.group, text='2')
+        Post.objects.create(author=self.user_2, group=self.group, text='3')
+        self.assertEqual(self.get_stats(self.group).active_authors, 0)
+        refresh_all_group_stats()
+        self.assertEqual(self.get_stats(self.group).active_authors, 2)
+
+    def test_stats_follow_regroup(self):
+        """Смена группы поста (в т.ч. из админки) переносит статистику"""
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Пост')
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(self.get_stats(self.group).posts_count, 0)
+        self.assertEqual(self.get_stats(self.group_2).posts_count, 1)
+        self.assertEqual(self.get_stats(self.group_2).last_post_date,
+                         post.pub_date)
+        post.group = None
+        post.save()
+        self.assertEqual(self.get_stats(self.group_2).posts_count, 0)
+        self.assertIsNone(self.get_stats(self.group_2).last_post_date)
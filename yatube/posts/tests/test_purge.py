@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.taskqueue import run_next
+
+from ..models import (Comment, CommentLike, Follow, Group, GroupStats, Post,
+                      PostLike)
+from ..purge import delete_in_batches
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+small_gif = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PURGE_BATCH_SIZE=2)
+class PurgeTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.author = User.objects.create(username='prolific')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.posts = [
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Пост {number}')
+            for number in range(5)
+        ]
+        self.posts[0].image = SimpleUploadedFile(
+            'purge.gif', small_gif, content_type='image/gif')
+        self.posts[0].save()
+        for post in self.posts:
+            comment = Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+            PostLike.objects.create(user=self.reader, post=post)
+            CommentLike.objects.create(user=self.author, comment=comment)
+        Follow.objects.create(user=self.reader, author=self.author)
+        Task.objects.all().delete()
+        self.client.force_login(self.admin)
+
+    def run_tasks(self):
+        while run_next():
+            pass
+
+    def test_delete_in_batches(self):
+        """Строки удаляются порциями до конца выборки"""
+        deleted = delete_in_batches(PostLike.objects.all())
+        self.assertEqual(deleted, 5)
+        self.assertFalse(PostLike.objects.exists())
+
+    def test_admin_user_delete_hides_then_purges(self):
+        """Удаление пользователя в админке скрывает его, а задача
+        удаляет все связанные строки и файлы картинок"""
+        image_path = self.posts[0].image.path
+        self.assertTrue(os.path.exists(image_path))
+        self.client.post(
+            reverse('admin:auth_user_delete', args=(self.author.pk,)),
+            {'post': 'yes'})
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(Post.all_objects.filter(author=self.author).count(),
+                         5)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 0)
+        self.run_tasks()
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.all_objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(PostLike.objects.exists())
+        self.assertFalse(CommentLike.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(os.path.exists(image_path))
+        self.assertTrue(User.objects.filter(pk=self.reader.pk).exists())
+
+    def test_admin_post_delete(self):
+        """Удаленный в админке пост сразу пропадает со страниц"""
+        post = self.posts[1]
+        self.client.post(
+            reverse('admin:posts_post_delete', args=(post.pk,)),
+            {'post': 'yes'})
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertEqual(response.status_code, 404)
+        self.run_tasks()
+        self.assertFalse(Post.all_objects.filter(pk=post.pk).exists())
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertFalse(Comment.objects.filter(post_id=post.pk).exists())
+
+    def test_reactivated_user_is_not_purged(self):
+        """Восстановленного до очистки пользователя задача не трогает"""
+        self.client.post(
+            reverse('admin:auth_user_delete', args=(self.author.pk,)),
+            {'post': 'yes'})
+        User.objects.filter(pk=self.author.pk).update(is_active=True)
+        self.run_tasks()
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
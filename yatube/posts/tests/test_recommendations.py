@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Follow, Post, PostLike, Recommendation
+from ..recommendations import refresh_recommendations
+
+User = get_user_model()
+
+
+class RecommendationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='reader')
+        cls.friend = User.objects.create(username='friend')
+        cls.friend_of_friend = User.objects.create(username='fof')
+        cls.liked = User.objects.create(username='liked')
+        cls.similar = User.objects.create(username='similar')
+        cls.co_liked = User.objects.create(username='co_liked')
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+        Follow.objects.create(user=cls.friend, author=cls.user)
+        liked_post = Post.objects.create(author=cls.liked, text='Пост')
+        co_liked_post = Post.objects.create(author=cls.co_liked, text='Пост')
+        PostLike.objects.create(user=cls.user, post=liked_post)
+        PostLike.objects.create(user=cls.similar, post=liked_post)
+        PostLike.objects.create(user=cls.similar, post=co_liked_post)
+
+    def recommended(self, user):
+        return list(Recommendation.objects.filter(user=user)
+                    .values_list('author__username', flat=True))
+
+    def test_friends_of_friends_and_co_likes(self):
+        """Рекомендуются друзья друзей и авторы с похожими лайками"""
+        refresh_recommendations()
+        self.assertEqual(self.recommended(self.user),
+                         ['fof', 'co_liked', 'liked'])
+        self.assertNotIn('friend', self.recommended(self.user))
+
+    def test_parallel_chunks(self):
+        """Расчет по порциям в нескольких процессах дает тот же результат"""
+        refresh_recommendations()
+        expected = list(Recommendation.objects.values_list(
+            'user_id', 'author_id', 'rank'))
+        refresh_recommendations(processes=2, chunk=1)
+        self.assertEqual(
+            sorted(Recommendation.objects.values_list(
+                'user_id', 'author_id', 'rank')),
+            sorted(expected))
+
+    def test_profile_shows_recommendations(self):
+        """Профиль показывает рекомендации текущему пользователю"""
+        refresh_recommendations()
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:profile', kwargs={'username': 'liked'}))
+        self.assertContains(response, 'На кого подписаться')
+        self.assertContains(response, '/profile/fof/')
@@ -50,6 +50,7 @@ class PostURLTest(TestCase):
         """Проверяем, что в posts используеются верные шаблоны"""
         urls = {
             reverse('posts:main_page'): 'posts/index.html',
+            reverse('posts:group_index'): 'posts/group_index.html',
             reverse('posts:group_list_page',
                     kwargs={
                         'slug': self.group.slug
@@ -144,6 +145,7 @@ class PostURLTest(TestCase):
         username = PostURLTest.post.author.username
         urls_status = {
             '/': HTTPStatus.OK,
+            '/group/': HTTPStatus.OK,
             f'/group/{slug}/': HTTPStatus.OK,
             f'/profile/{username}/': HTTPStatus.OK,
             f'/posts/{post_id}/': HTTPStatus.OK,
@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from datetime import timedelta
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -9,10 +10,13 @@ from django.core.cache import cache
 from django import forms
 from django.urls import reverse
 from django.conf import settings
+from django.utils import timezone
 
 from http import HTTPStatus
 
-from ..models import Group, Post, Comment, Follow
+from ..cards import render_cards
+from ..feed import load_timelines, merged_post_ids
+from ..models import Group, Post, Comment, Follow, UserStats
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
@@ -143,6 +147,15 @@ class PostViewsTest(TestCase):
         self.assertEqual(post_image, PostViewsTest.post.image)
         self.assertEqual(post_pub_date, PostViewsTest.post.pub_date)
 
+    def test_group_index_correct_context(self):
+        """Шаблон group_index получает статистику сообществ"""
+        response = self.authorized_client.get(reverse('posts:group_index'))
+        stats = {obj.group: obj for obj in response.context['page_obj']}
+        self.assertEqual(stats[self.group].posts_count, 1)
+        self.assertEqual(stats[self.group].last_post_date,
+                         self.post.pub_date)
+        self.assertEqual(stats[self.group_2].posts_count, 0)
+
     def test_profile_correct_context(self):
         """Шаблон profile сформирован с правильным контекстом."""
         response = self.authorized_client.get(reverse(
@@ -193,6 +206,52 @@ class PostViewsTest(TestCase):
         new_post_obj = response_after_clear.context['page_obj'][0]
         self.assertEqual(new_post_obj.text, Post.objects.latest('pk').text)
 
+    def test_post_card_cache(self):
+        """Карточка поста кэшируется и обновляется после правки поста"""
+        cache.clear()
+        post = Post.objects.select_related('author', 'group').get(
+            pk=self.post.pk)
+        first_render = render_cards([post])
+        self.assertIn(post.text, first_render[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(render_cards([post]), first_render)
+        post.text = 'Исправленный текст'
+        post.save()
+        self.assertIn('Исправленный текст', render_cards([post])[0])
+
+    def test_main_page_cache_shared_between_users(self):
+        """Главная страница кэшируется одна на всех, а персональные
+        фрагменты подставляются для каждого запроса"""
+        cache.clear()
+        guest_response = Client().get(reverse('posts:main_page'))
+        self.assertNotContains(guest_response, 'Избранные авторы')
+        Post.objects.create(author=self.user, text='Пост после кэширования')
+        response = self.authorized_client.get(reverse('posts:main_page'))
+        self.assertNotContains(response, 'Пост после кэширования')
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_personal_buttons(self):
+        """Кнопки лайка и подписки зависят от пользователя"""
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.user3.username}))
+        self.assertContains(response, reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user3.username}))
+        response = self.authorized_client_2.get(reverse(
+            'posts:profile', kwargs={'username': self.user3.username}))
+        self.assertContains(response, reverse(
+            'posts:profile_follow', kwargs={'username': self.user3.username}))
+        response = self.authorized_client_3.get(reverse(
+            'posts:profile', kwargs={'username': self.user3.username}))
+        self.assertNotContains(response, 'Подписаться')
+        self.authorized_client_2.get(reverse(
+            'posts:like_post', kwargs={'post_id': self.post.pk}))
+        response = self.authorized_client_2.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertContains(response, reverse(
+            'posts:dislike_post', kwargs={'post_id': self.post.pk}))
+
     def test_another_group(self):
         """Пост отображается на нужных страницах
         и не попадает в правильную группу"""
@@ -255,6 +314,41 @@ class PostViewsTest(TestCase):
         self.assertEqual(Follow.objects.count(), follows_count)
         self.assertRedirects(response, f'/profile/{self.user3.username}/')
 
+    def test_follow_counts(self):
+        """Счетчики подписок обновляются при подписке и отписке"""
+        self.authorized_client_2.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.user3.username}))
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.user3.username}))
+        self.assertEqual(response.context['stats'].followers_count, 2)
+        self.authorized_client_2.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.user3.username}))
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.user2.username}))
+        self.assertEqual(response.context['stats'].following_count, 0)
+        self.assertEqual(
+            UserStats.objects.get(user=self.user3).followers_count, 1)
+
+    @override_settings(FOLLOWS_ON_PAGE=1)
+    def test_followers_cursor(self):
+        """Список подписчиков листается курсором по id"""
+        Follow.objects.create(user=self.user2, author=self.user3)
+        url = reverse('posts:followers',
+                      kwargs={'username': self.user3.username})
+        response = self.client.get(url)
+        first = response.context['follows']
+        self.assertEqual([f.user for f in first], [self.user2])
+        response = self.client.get(
+            url, {'after': response.context['next_cursor']})
+        self.assertEqual(
+            [f.user for f in response.context['follows']], [self.user])
+        self.assertIsNone(response.context['next_cursor'])
+        response = self.client.get(reverse(
+            'posts:following', kwargs={'username': self.user.username}))
+        self.assertEqual(
+            [f.author for f in response.context['follows']], [self.user3])
+
     def test_follower_lent_update(self):
         """Новый пост появляется у подписчика в ленте
          и не появится у того, кто не подписан"""
@@ -273,6 +367,56 @@ class PostViewsTest(TestCase):
                                  (reverse('posts:follow_index')))
         self.assertEqual(len(response_not_follower.context['page_obj']), 0)
 
+    def test_merged_follow_feed(self):
+        """Лента слиянием лент авторов совпадает с лентой по JOIN"""
+        Follow.objects.create(user=self.user, author=self.user2)
+        for number in range(3):
+            Post.objects.create(author=self.user2, text=f'Второй {number}')
+            Post.objects.create(author=self.user3, text=f'Третий {number}')
+        url = reverse('posts:follow_index')
+        joined = list(self.authorized_client.get(url).context['page_obj'])
+        with override_settings(FEED_MERGE_MIN_FOLLOWING=1):
+            response = self.authorized_client.get(url)
+            self.assertEqual(list(response.context['page_obj']), joined)
+            Post.objects.create(author=self.user3, text='Свежий')
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['page_obj'][0].text, 'Свежий')
+
+    @override_settings(FEED_TIMELINE_LENGTH=2)
+    def test_timelines_are_limited_in_sql(self):
+        """Из базы читаются только последние посты каждого автора"""
+        for number in range(4):
+            Post.objects.create(author=self.user2, text=f'Пост {number}')
+        latest = list(Post.objects.filter(author=self.user2)
+                      .order_by('-pub_date', '-id')[:2])
+        timelines = load_timelines([self.user2.pk, self.user3.pk])
+        self.assertEqual([post_id for _, post_id in timelines[self.user2.pk]],
+                         [post.pk for post in latest])
+        self.assertLessEqual(len(timelines[self.user3.pk]), 2)
+
+
+    @override_settings(FEED_TIMELINE_LENGTH=2)
+    def test_merge_stops_at_truncated_timeline(self):
+        """Лента не перескакивает через посты, отрезанные от ленты
+        автора"""
+        now = timezone.now()
+        rare = User.objects.create(username='rare')
+        frequent = User.objects.create(username='frequent')
+        old_posts = [
+            Post.objects.create(author=rare, text=f'Старый {number}')
+            for number in range(2)
+        ]
+        fresh_posts = [
+            Post.objects.create(author=frequent, text=f'Свежий {number}')
+            for number in range(3)
+        ]
+        for days, post in enumerate(reversed(old_posts + fresh_posts)):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=days))
+        post_ids = merged_post_ids([rare.pk, frequent.pk], 10)
+        self.assertEqual(post_ids,
+                         [fresh_posts[2].pk, fresh_posts[1].pk])
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -328,3 +472,61 @@ class PaginatorViewsTest(TestCase):
                 response = self.authorized_client.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']),
                                  records_on_page)
+
+
+class CommentLikesTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.author = User.objects.create(username='commenter')
+        self.reader = User.objects.create(username='liker')
+        self.client.force_login(self.reader)
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.comments = [
+            Comment.objects.create(
+                post=self.post, author=self.author, text=f'Комментарий {n}')
+            for n in range(3)
+        ]
+
+    def test_like_is_idempotent(self):
+        """Повторный лайк комментария не меняет счетчик, снятие уменьшает"""
+        comment = self.comments[0]
+        url = reverse('posts:like_comment', args=(comment.pk,))
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', args=(self.post.pk,)))
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 1)
+        self.client.get(reverse('posts:unlike_comment', args=(comment.pk,)))
+        self.client.get(reverse('posts:unlike_comment', args=(comment.pk,)))
+        comment.refresh_from_db()
+        self.assertEqual(comment.likes_count, 0)
+
+    def test_post_likes_count(self):
+        """Счетчик лайков поста меняется вместе с лайками"""
+        url = reverse('posts:like_post', args=(self.post.pk,))
+        self.client.get(url)
+        self.client.get(url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertContains(response, 'Понравилось: 1')
+        self.client.get(reverse('posts:dislike_post', args=(self.post.pk,)))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_liked_state_in_one_query(self):
+        """Состояние лайков всей страницы комментариев берется одним запросом"""
+        self.client.get(
+            reverse('posts:like_comment', args=(self.comments[1].pk,)))
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        comments = response.context['comments']
+        with self.assertNumQueries(1):
+            liked = {comment.pk: comment.liked
+                     for comment in comments.all()}
+        self.assertEqual(liked, {
+            comment.pk: comment == self.comments[1]
+            for comment in self.comments
+        })
+        self.assertContains(response, 'Понравилось: 1')
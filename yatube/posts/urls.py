@@ -6,8 +6,19 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='main_page'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list_page'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/followers/',
+        views.followers,
+        name='followers'
+    ),
+    path(
+        'profile/<str:username>/following/',
+        views.following,
+        name='following'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -36,5 +47,15 @@ urlpatterns = [
         'posts/<int:post_id>/dislike/',
         views.dislike,
         name='dislike_post'
+    ),
+    path(
+        'comments/<int:comment_id>/like/',
+        views.like_comment,
+        name='like_comment'
+    ),
+    path(
+        'comments/<int:comment_id>/unlike/',
+        views.unlike_comment,
+        name='unlike_comment'
     )
 ]
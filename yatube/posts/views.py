@@ -1,14 +1,23 @@
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.db.models import Exists, OuterRef
 
-from .models import Post, Group, User, Follow, Likes
+from core.paginator import CachedCountPaginator, ChainedSequence, cached_count
+
+from .archive import get_post
+from .feed import follow_feed
+from .models import (ArchivedPost, Comment, CommentLike, Likes, Post,
+                     PostLike, Group, GroupStats, User, Follow)
 from .forms import PostForm, CommentForm
+from .stats import (ALL_POSTS_COUNT_KEY, author_posts_count_key,
+                    comment_likes_changed, get_user_stats)
 
 
-def paginator(queryset, request):
-    paginator = Paginator(queryset, settings.POSTS_ON_PAGE)
+def paginator(queryset, request, count_key=None, count=None):
+    paginator = CachedCountPaginator(queryset, settings.POSTS_ON_PAGE,
+                                     count_key=count_key, count=count)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
@@ -18,49 +27,109 @@ def paginator(queryset, request):
 
 def index(request):
     posts = Post.objects.select_related('author', 'group').all()
-    context = paginator(posts, request)
+    context = paginator(posts, request, count_key=ALL_POSTS_COUNT_KEY)
     return render(request, 'posts/index.html', context)
 
 
+def group_index(request):
+    groups = GroupStats.objects.select_related('group').all()
+    context = paginator(groups, request)
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author').all()
+    posts_count = (GroupStats.objects.filter(group=group)
+                   .values_list('posts_count', flat=True).first())
     context = {
         'group': group,
         'posts': posts,
     }
-    context.update(paginator(posts, request))
+    context.update(paginator(posts, request, count=posts_count))
     return render(request, 'posts/group_list.html', context)
 
 
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     posts = author.posts.select_related('author', 'group').all()
-    user = request.user
-    following = (user.is_authenticated
-                 and Follow.objects.filter(user=user, author=author).exists())
-
+    stats = get_user_stats(author.pk)
     context = {
         'author': author,
-        'following': following
+        'stats': stats,
     }
-    context.update(paginator(posts, request))
+    count_key = author_posts_count_key(author.pk)
+    # архив удаленного пользователя скрыт, как и его горячие посты
+    if stats.archived_posts_count and author.is_active:
+        # архив дочитывается после горячих постов на последних страницах
+        archived = author.archived_posts.select_related('author', 'group')
+        context.update(paginator(
+            ChainedSequence(posts, archived), request,
+            count=(cached_count(posts, count_key)
+                   + stats.archived_posts_count)))
+    else:
+        context.update(paginator(posts, request, count_key=count_key))
     return render(request, 'posts/profile.html', context)
 
 
+def cursor_page(queryset, request):
+    """Страница по курсору ?after=<id>: без OFFSET и без COUNT."""
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        queryset = queryset.filter(id__lt=int(after))
+    rows = list(queryset.order_by('-id')[:settings.FOLLOWS_ON_PAGE + 1])
+    has_next = len(rows) > settings.FOLLOWS_ON_PAGE
+    rows = rows[:settings.FOLLOWS_ON_PAGE]
+    return {
+        'follows': rows,
+        'next_cursor': rows[-1].id if has_next else None,
+    }
+
+
+def followers(request, username):
+    author = get_object_or_404(User, username=username)
+    context = {
+        'author': author,
+        'stats': get_user_stats(author.pk),
+        'show_followers': True,
+    }
+    context.update(cursor_page(
+        Follow.objects.filter(author=author).select_related('user'),
+        request))
+    return render(request, 'posts/follow_list.html', context)
+
+
+def following(request, username):
+    author = get_object_or_404(User, username=username)
+    context = {
+        'author': author,
+        'stats': get_user_stats(author.pk),
+        'show_followers': False,
+    }
+    context.update(cursor_page(
+        Follow.objects.filter(user=author).select_related('author'),
+        request))
+    return render(request, 'posts/follow_list.html', context)
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_post(post_id)
+    if post is None:
+        raise Http404('Пост не найден')
     posts_count = post.author.posts.count()
-    comments = post.comments.all()
-    user = request.user
-    liked = (user.is_authenticated
-             and Likes.objects.filter(user=user, post=post).exists())
+    if post.author.is_active:
+        posts_count += get_user_stats(post.author_id).archived_posts_count
+    comments = post.comments.select_related('author')
+    if request.user.is_authenticated and not isinstance(post, ArchivedPost):
+        # состояние лайка для всей страницы комментариев одним запросом
+        comments = comments.annotate(liked=Exists(CommentLike.objects.filter(
+            comment=OuterRef('pk'), user=request.user)))
     form = CommentForm()
     context = {
         'post': post,
+        'archived': isinstance(post, ArchivedPost),
         'posts_count': posts_count,
         'comments': comments,
-        'liked': liked,
         'form': form
     }
     return render(request, 'posts/post_detail.html', context)
@@ -113,7 +182,12 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     user = request.user
-    posts = Post.objects.filter(author__following__user=user)
+    following_count = get_user_stats(user.pk).following_count
+    if following_count >= settings.FEED_MERGE_MIN_FOLLOWING:
+        posts = follow_feed(user.pk)
+    else:
+        posts = (Post.objects.select_related('author', 'group')
+                 .filter(author__following__user=user))
     context = paginator(posts, request)
     return render(request, 'posts/follow.html', context)
 
@@ -141,12 +215,35 @@ def like_post(request, post_id):
     if request.user == post.author:
         return redirect('posts:post_detail', post_id=post_id)
     liker = request.user
-    Likes.objects.create(user=liker, post=post)
+    PostLike.objects.get_or_create(post=post, user=liker)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def dislike(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    Likes.objects.filter(user=request.user, post=post).delete()
+    PostLike.objects.filter(post=post, user=request.user).delete()
+    # иначе split_likes вернул бы еще не перенесенный лайк
+    Likes.objects.filter(post=post, user=request.user).delete()
     return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def like_comment(request, comment_id):
+    comment = get_object_or_404(
+        Comment, id=comment_id, post__is_hidden=False)
+    if request.user != comment.author:
+        CommentLike.objects.get_or_create(comment=comment, user=request.user)
+    return redirect('posts:post_detail', post_id=comment.post_id)
+
+
+@login_required
+def unlike_comment(request, comment_id):
+    comment = get_object_or_404(
+        Comment, id=comment_id, post__is_hidden=False)
+    CommentLike.objects.filter(comment=comment, user=request.user).delete()
+    legacy, _ = Likes.objects.filter(
+        comment=comment, user=request.user).delete()
+    if legacy:
+        comment_likes_changed(comment.pk, -legacy)
+    return redirect('posts:post_detail', post_id=comment.post_id)
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from core.admin import SoftDeleteAdmin
+from posts.purge import soft_delete_user
+
+User = get_user_model()
+
+
+class UserAdmin(SoftDeleteAdmin, BaseUserAdmin):
+    def soft_delete(self, obj):
+        soft_delete_user(obj)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
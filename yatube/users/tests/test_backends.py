@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from http import HTTPStatus
+
+User = get_user_model()
+
+
+@override_settings(AUTH_FROM_CACHE=True)
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='cached_user', password='old-password-123')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_user_loaded_from_cache(self):
+        """Пользователь сессии не запрашивается из БД повторно"""
+        self.client.get(reverse('about:author'))
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_invalidates_cache(self):
+        """После смены пароля старая сессия перестает работать"""
+        self.client.get(reverse('about:author'))
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password-456')
+        user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
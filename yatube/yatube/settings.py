@@ -51,12 +51,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CachedGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.HolePunchMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -130,8 +134,23 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# раздача статики самим приложением: хэшированные имена кэшируются навсегда
+STATIC_SERVE: bool = not DEBUG
+STATIC_MAX_AGE: int = 60
+STATIC_IMMUTABLE_MAX_AGE: int = 365 * 24 * 60 * 60
+STATIC_COMPRESS_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.json', '.map', '.html',
+)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_MAX_AGE: int = 24 * 60 * 60
+# передача файлов медиа веб-серверу: None, 'x-accel-redirect' (nginx,
+# internal location MEDIA_ACCEL_PREFIX) или 'x-sendfile' (apache, lighttpd)
+MEDIA_ACCEL_REDIRECT = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 # login settings
 
@@ -139,13 +158,36 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:main_page'
 # LOGOUT_REDIRECT_URL = 'posts:main_page'
-
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+
+# письма складываются в очередь (core.QueuedEmail), а отправляет их
+# manage.py send_queued_mail через движок filebased.EmailBackend
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+MAIL_QUEUE_BATCH_SIZE: int = 50
+MAIL_QUEUE_MAX_ATTEMPTS: int = 5
+MAIL_QUEUE_RETRY_SECONDS: int = 60
+MAIL_QUEUE_INTERVAL: int = 60
+# метрики сбрасываются в таблицу core.Counter не чаще раза в столько секунд
+METRICS_FLUSH_SECONDS: float = 10
+# письма одного окна отправляет одна задача
+MAIL_QUEUE_DRAIN_SECONDS: int = 5
+# аренда писем воркером на время отправки
+MAIL_QUEUE_LEASE_SECONDS: int = 5 * 60
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # константы для постов
 POSTS_ON_PAGE: int = 10
+FOLLOWS_ON_PAGE: int = 50
+# лента подписок слиянием закэшированных лент авторов (posts.feed)
+# для тех, кто подписан хотя бы на FEED_MERGE_MIN_FOLLOWING авторов
+FEED_MERGE_MIN_FOLLOWING: int = 200
+FEED_TIMELINE_LENGTH: int = 100
+# invalidate_timeline сбрасывает ленту автора только в кэше своего процесса:
+# с LocMem остальные процессы видят новый пост, когда лента истечет
+FEED_TIMELINE_SECONDS: int = 60
+FEED_LOAD_CHUNK: int = 500
+FEED_MAX_POSTS: int = 1000
 SLICE_FOR_TITLE: int = 30
 SYMBOLS_IN_STR: int = 15
 # обработка 403
@@ -153,7 +195,134 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 #  Кэширование
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # значения от COMPRESS_MIN_LENGTH байт хранятся сжатыми
+        'BACKEND': 'core.cache_backends.CompressedLocMemCache',
+        'OPTIONS': {
+            'COMPRESS_MIN_LENGTH': 1024,
+            'COMPRESS_LEVEL': 6,
+        },
     }
 }
 CASH_TIME_SECONDS: int = 20
+# gzip-сжатие ответов (core.middleware.CachedGZipMiddleware)
+GZIP_LEVEL: int = 6
+GZIP_MIN_LENGTH: int = 200
+GZIP_CONTENT_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/xml',
+    'application/javascript', 'application/json', 'image/svg+xml',
+)
+# наибольшая случайная добавка в заголовке gzip для страниц с CSRF-токеном
+GZIP_BREACH_PADDING: int = 32
+# сжатые gzip-тела ответов переиспользуются по хэшу тела
+GZIP_CACHE_MIN_LENGTH: int = 1024
+GZIP_CACHE_SECONDS: int = 5 * 60
+# сколько отдавать устаревший фрагмент, пока другой воркер его пересчитывает
+CACHE_STALE_SECONDS: int = 30
+# блокировка пересчета фрагмента и период опроса ждущих воркеров
+CACHE_LOCK_SECONDS: int = 10
+CACHE_LOCK_POLL_SECONDS: float = 0.05
+# коэффициент вероятностного досрочного обновления (0 - отключено)
+CACHE_EARLY_REFRESH_BETA: float = 1.0
+# окно, за которое считаются активные авторы сообщества
+ACTIVE_AUTHORS_DAYS: int = 7
+# период полного пересчета статистики, в том числе активных авторов
+GROUP_STATS_INTERVAL: int = 60 * 60
+# рекомендации авторов: период пересчета, размер списка, число процессов,
+# пользователей в одной порции и вес совпадающих лайков относительно подписок
+RECOMMENDATIONS_INTERVAL: int = 6 * 60 * 60
+RECOMMENDATIONS_TOP: int = 10
+RECOMMENDATIONS_PROCESSES: int = 1
+RECOMMENDATIONS_CHUNK: int = 1000
+RECOMMENDATIONS_LIKE_WEIGHT: float = 0.5
+RECOMMENDATIONS_ON_PROFILE: int = 5
+# время жизни закэшированных карточек постов
+CARD_CACHE_SECONDS: int = 60 * 60
+# прогрев после деплоя (manage.py warmup или при старте wsgi)
+WARMUP_ON_BOOT: bool = False
+WARMUP_URL_NAMESPACES = ('posts', 'users', 'about')
+WARMUP_INDEX_PAGES: int = 3
+WARMUP_TOP_GROUPS: int = 10
+WARMUP_TOP_PROFILES: int = 10
+# пагинация: время жизни закэшированных количеств и окно номеров страниц
+PAGINATOR_COUNT_SECONDS: int = 5 * 60
+PAGINATOR_ON_EACH_SIDE: int = 2
+PAGINATOR_ON_ENDS: int = 1
+# сессии (с записью в БД) и пользователи сессий из кэша. Включать только
+# с кэшем, общим для всех процессов (memcached и т.п.): иначе выход и смена
+# пароля не будут видны другим процессам до истечения кэша
+AUTH_FROM_CACHE: bool = False
+USER_CACHE_SECONDS: int = 5 * 60
+if AUTH_FROM_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# удаление из админки только скрывает пользователей и посты, а связанные
+# строки удаляет фоновая задача порциями по PURGE_BATCH_SIZE
+SOFT_DELETE: bool = True
+PURGE_BATCH_SIZE: int = 500
+# уведомления о новых постах (manage.py runsse). SSE_URL - адрес сервера
+# событий для браузера (обычно тот же хост через прокси на SSE_PORT)
+SSE_URL = '/events/'
+SSE_PATH = '/events/'
+SSE_HOST = '127.0.0.1'
+SSE_PORT: int = 8001
+SSE_SOCKET = os.path.join(BASE_DIR, 'sse.sock')
+# при SSE_PROCESSES > 1 события принимает брокер и рассылает процессам
+SSE_PROCESSES: int = 1
+SSE_BROKER_SOCKET = os.path.join(BASE_DIR, 'sse-broker.sock')
+SSE_BROKER_BUFFER: int = 1024 * 1024
+# предел размера события: больше не публикуется (датаграмма не пройдет)
+SSE_MAX_EVENT_BYTES: int = 32 * 1024
+SSE_ALLOW_ORIGIN = None
+SSE_HEARTBEAT_SECONDS: int = 25
+SSE_RETRY_MS: int = 10000
+SSE_QUEUE_SIZE: int = 100
+SSE_TOKEN_MAX_AGE: int = 24 * 60 * 60
+# ограничение частоты: имя URL -> (размер корзины, токенов в секунду)
+RATE_LIMITS = {
+    'posts:post_create': (20, 0.1),
+    'posts:post_edit': (30, 0.5),
+    'posts:add_comment': (30, 0.5),
+    'posts:like_post': (60, 1),
+    'posts:dislike_post': (60, 1),
+    'posts:like_comment': (60, 1),
+    'posts:unlike_comment': (60, 1),
+    'posts:profile_follow': (60, 1),
+    'posts:profile_unfollow': (60, 1),
+}
+# представления, которые и показывают форму, и принимают ее: лимит только
+# для POST и других небезопасных методов
+RATE_LIMIT_UNSAFE_ONLY = ('posts:post_create', 'posts:post_edit')
+# кэш с корзинами токенов. С LocMem у каждого процесса свои корзины, и
+# клиент получает лимит, умноженный на число процессов: для точного лимита
+# нужен кэш, общий для всех процессов (memcached, Redis)
+RATE_LIMIT_CACHE: str = 'default'
+# учитывать X-Forwarded-For (только за доверенным прокси)
+RATE_LIMIT_TRUST_FORWARDED: bool = False
+# сброс нагрузки: предел ожидания в очереди по X-Request-Start
+LOAD_SHED_LATENCY_SECONDS: float = 2
+LOAD_SHED_RETRY_AFTER: int = 5
+# архивация: посты старше ARCHIVE_AFTER_DAYS переносятся в архивные таблицы
+ARCHIVE_AFTER_DAYS: int = 365
+ARCHIVE_BATCH_SIZE: int = 500
+ARCHIVE_INTERVAL: int = 24 * 60 * 60
+# фильтры Блума лайков и подписок пользователя (posts.membership)
+# Включать только с кэшем, общим для всех процессов (memcached, Redis):
+# новая версия фильтра после лайка иначе видна лишь процессу, который его
+# записал, и остальные до BLOOM_CACHE_SECONDS отвечают «нет»
+BLOOM_FILTERS: bool = False
+BLOOM_ERROR_RATE: float = 0.01
+BLOOM_MIN_CAPACITY: int = 64
+BLOOM_CACHE_SECONDS: int = 24 * 60 * 60
+# перенос лайков из Likes в PostLike/CommentLike (manage.py split_likes)
+LIKES_SPLIT_BATCH_SIZE: int = 1000
+# фоновые задачи (core.Task, manage.py run_workers)
+TASK_WORKERS: int = 2
+TASK_POLL_SECONDS: float = 1
+TASK_CLAIM_BATCH: int = 10
+TASK_LEASE_SECONDS: int = 5 * 60
+# для задач, которые обходят всю таблицу (архив, статистика, рассылка)
+TASK_LONG_LEASE_SECONDS: int = 2 * 60 * 60
+TASK_RETRY_SECONDS: int = 30
+TASK_MAX_ATTEMPTS: int = 3
+# сколько хранить выполненные и упавшие задачи (core.prune_tasks)
+TASK_RETENTION_DAYS: int = 7
+TASK_PRUNE_INTERVAL: int = 24 * 60 * 60